@@ -1,19 +1,28 @@
 # servidor-central/app.py
-from flask import Flask, render_template, request, jsonify, Response
+from flask import Flask, render_template, request, jsonify, Response, redirect
 from flask_socketio import SocketIO, emit, join_room
-import cv2
-import face_recognition
-import pickle
 import os
-import numpy as np
-import base64
-from io import BytesIO
-from PIL import Image
 import json
 import time
 from datetime import datetime
 import threading
 import requests
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from models.alertas import AgrupadorAlertas, chave_deteccao
+from models.cluster import Coordenador, FilaLocalManager
+from models.database import criar_estado
+from models.galeria import GaleriaVersionada
+from models.carga import MonitorCarga
+from models.face_processor import MotorReconhecimento
+from models.snapshots import ArmazemSnapshots
+from models.estatisticas import EstatisticasDeteccoes, EstatisticasCompartilhadas, GRANULARIDADES
+from models.streaming import CanalStreaming
+from shared import protocols
+from shared.utils import jpeg_de_base64
 
 # Configuração da aplicação
 app = Flask(__name__)
@@ -22,8 +31,16 @@ app.config.update({
     'UPLOAD_FOLDER': 'uploads'
 })
 
+# Fila de mensagens entre workers: broadcasts de um worker chegam aos clientes de todos
+opcoes_fila = {}
+if config.FILA_MENSAGENS == 'local://':
+    opcoes_fila['client_manager'] = FilaLocalManager()
+elif config.FILA_MENSAGENS:
+    opcoes_fila['message_queue'] = config.FILA_MENSAGENS
+
 # SOLUÇÃO: Configuração WebSocket ultra-estável
 socketio = SocketIO(app, 
+                   **opcoes_fila,
                    cors_allowed_origins="*",
                    async_mode='threading',
                    ping_timeout=120,           # Aumentado
@@ -36,15 +53,45 @@ socketio = SocketIO(app,
 
 # Configurações de arquivos
 ARQUIVOS = {
-    'encodings': 'data/encodings.pickle',
+    'encodings': 'data/encodings.pickle',          # formato antigo {nomes, encodings}, sempre atual
+    'galeria': 'data/galeria',                     # snapshot + log versionados, por worker
     'nodes': 'data/nodes.json',
-    'alerts': 'data/alerts.json'
+    'alerts': 'data/alerts.json',
+    'snapshots': 'data/snapshots',
+    'stats': 'data/stats.json'
 }
 
 # Criar diretórios necessários
 for pasta in ['data', 'uploads', app.config['UPLOAD_FOLDER']]:
     os.makedirs(pasta, exist_ok=True)
 
+# Pilha de reconhecimento (dlib/face_recognition) carregada sob demanda ou no aquecimento
+motor = MotorReconhecimento(aquecimento=config.AQUECER_RECONHECIMENTO)
+
+# Carga de reconhecimento: define intervalo/escala/qualidade sugeridos aos clientes web
+monitor_carga = MonitorCarga(capacidade=config.CAPACIDADE_RECONHECIMENTO,
+                             latencia_alvo=config.LATENCIA_ALVO_MS / 1000)
+# (intervalo em ms, escala, qualidade JPEG) de cada rota sem carga, os valores fixos de antes
+BASE_RECONHECER = (800, 0.4, 0.5)  # página de reconhecimento
+BASE_DETECTAR = (200, 1.0, 0.8)    # pré-visualização do cadastro, em resolução cheia
+BASE_STREAM = (200, 0.4, 0.5)      # canal de streaming (quadros velhos são descartados)
+
+# Imagens das detecções, gravadas sem recodificação em segmentos com retenção
+# (um diretório por worker, para que workers no mesmo host não escrevam nos mesmos segmentos)
+armazem_snapshots = ArmazemSnapshots(
+    os.path.join(ARQUIVOS['snapshots'], config.WORKER_ID),
+    tamanho_segmento=config.SNAPSHOTS_SEGMENTO_MB * 1024 * 1024,
+    max_idade=config.SNAPSHOTS_RETENCAO_HORAS * 3600,
+    max_bytes=config.SNAPSHOTS_MAX_MB * 1024 * 1024
+)
+
+# Canal de reconhecimento em streaming: um quadro pendente por sessão, o mais recente vence
+canal_streaming = CanalStreaming(
+    lambda quadro: processar_quadro_stream(quadro),
+    lambda sid, evento, dados: socketio.emit(evento, dados, to=sid),
+    trabalhadores=config.CAPACIDADE_RECONHECIMENTO
+)
+
 # Estado global do sistema
 sistema = {
     'nodes': {},
@@ -52,6 +99,40 @@ sistema = {
     'stats': {'total_detections': 0, 'active_nodes': 0, 'known_faces': 0}
 }
 
+# Estado compartilhado entre workers e divisão dos nós por hash consistente
+estado = criar_estado(config.ESTADO_URL)
+coordenador = Coordenador(estado, config.WORKER_ID, config.WORKER_URL,
+                          ttl=config.TTL_WORKER, vnodes=config.VNODES_ANEL)
+ultimas_gravacoes_nodes = {}  # node_id -> horário da última gravação no estado
+
+# Galeria versionada: snapshot + log de mudanças incrementais em um diretório por
+# worker (workers no mesmo host não gravam nos mesmos arquivos); encodings.pickle
+# continua sendo regravado a cada mudança para leitores antigos.
+# Com estado externo (Redis), versões e log ficam nele e todos os workers os seguem;
+# 'memoria://' é local ao processo e não teria com quem compartilhar.
+diretorio_galeria = os.path.join(ARQUIVOS['galeria'], config.WORKER_ID)
+os.makedirs(diretorio_galeria, exist_ok=True)
+galeria = GaleriaVersionada(
+    os.path.join(diretorio_galeria, 'galeria.pickle'),
+    os.path.join(diretorio_galeria, 'galeria_log.pickle'),
+    arquivo_legado=ARQUIVOS['encodings'],
+    estado=None if config.ESTADO_URL.startswith('memoria://') else estado
+)
+
+# Contadores de detecções por minuto/hora, por nó e por identidade; com estado
+# externo, somados por todos os workers no próprio estado em vez de data/stats.json
+if config.ESTADO_URL.startswith('memoria://'):
+    estatisticas = EstatisticasDeteccoes(ARQUIVOS['stats'])
+    intervalo_estatisticas = config.INTERVALO_PERSISTENCIA_STATS
+else:
+    estatisticas = EstatisticasCompartilhadas(estado)
+    intervalo_estatisticas = config.INTERVALO_BATIMENTO
+
+# Detecções repetidas viram um único alerta por (nó, identidade) dentro da janela
+agrupador_alertas = AgrupadorAlertas(janela=config.JANELA_ALERTAS)
+ALERTAS_PERSISTIDOS = 100  # alertas mais recentes mantidos no estado compartilhado e em alerts.json
+lock_alertas = threading.Lock()  # criação local x mesclagem com os alertas dos outros workers
+
 # =================== FUNÇÕES UTILITÁRIAS ===================
 
 def carregar_json(arquivo, default=None):
@@ -72,80 +153,252 @@ def salvar_json(arquivo, dados):
     except Exception as e:
         print(f"Erro ao salvar {arquivo}: {e}")
 
-def carregar_encodings():
-    """Carrega encodings de rostos conhecidos."""
-    try:
-        if os.path.exists(ARQUIVOS['encodings']) and os.path.getsize(ARQUIVOS['encodings']) > 0:
-            with open(ARQUIVOS['encodings'], 'rb') as f:
-                return pickle.load(f)
-    except:
-        pass
-    return {"nomes": [], "encodings": []}
+def salvar_node(node_id, intervalo=0):
+    """
+    Persiste um nó alterado. Só o worker dono grava no estado compartilhado;
+    com `intervalo`, gravações repetidas do mesmo nó (heartbeats, contadores
+    de detecção) são limitadas a uma a cada `intervalo` segundos.
+    """
+    node = sistema['nodes'].get(node_id)
+    if node is None or not coordenador.eh_dono(node_id):
+        return False
+    agora = time.time()
+    if intervalo and agora - ultimas_gravacoes_nodes.get(node_id, 0) < intervalo:
+        return False
+    ultimas_gravacoes_nodes[node_id] = agora
+    estado.hset('nodes', node_id, node)
+    if not coordenador.distribuido:
+        salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    atualizar_stats()
+    return True
 
-def salvar_encodings(dados):
-    """Salva encodings de rostos."""
-    with open(ARQUIVOS['encodings'], 'wb') as f:
-        pickle.dump(dados, f)
+def remover_node(node_id):
+    """Remove o nó localmente e do estado compartilhado (chamado apenas pelo dono)."""
+    sistema['nodes'].pop(node_id, None)
+    ultimas_gravacoes_nodes.pop(node_id, None)
+    estado.hdel('nodes', node_id)
+    if not coordenador.distribuido:
+        salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    atualizar_stats()
+
+def sincronizar_nodes(remotos, assumidos=()):
+    """
+    Mescla no dicionário local os nós lidos do estado compartilhado. Nós
+    deste worker mantêm a cópia local, que é a mais recente; os recém-
+    assumidos partem da última cópia gravada pelo dono anterior. Nós dos
+    outros workers ficam com a cópia do estado e somem se o dono os removeu.
+    """
+    for node_id in list(sistema['nodes']):
+        if node_id not in remotos and not coordenador.eh_dono(node_id):
+            del sistema['nodes'][node_id]
+    for node_id, node in remotos.items():
+        if node_id in assumidos or node_id not in sistema['nodes'] or not coordenador.eh_dono(node_id):
+            sistema['nodes'][node_id] = node
+    atualizar_stats()
+
+def redirecionar_para_dono(node_id):
+    """Resposta 307 para o worker dono do nó, ou None se o dono é este worker."""
+    if coordenador.eh_dono(node_id):
+        return None
+    url = coordenador.url_do_dono(node_id)
+    if not url:
+        return None
+    return redirect(url.rstrip('/') + request.full_path.rstrip('?'), code=307)
+
+def carregar_encodings():
+    """Retorna nomes e encodings conhecidos a partir da galeria em memória."""
+    return galeria.como_dicionario()
 
 def processar_imagem_base64(imagem_base64):
     """Converte imagem base64 para array numpy RGB com validação melhorada."""
     try:
-        if ',' in imagem_base64:
-            image_data = base64.b64decode(imagem_base64.split(',')[1])
-        else:
-            image_data = base64.b64decode(imagem_base64)
-        
-        image = Image.open(BytesIO(image_data))
-        
-        # CORREÇÃO 1: Redimensionar imagem se muito grande
-        width, height = image.size
-        if width > 800 or height > 600:
-            # Manter proporção mas reduzir tamanho
-            ratio = min(800/width, 600/height)
-            new_size = (int(width * ratio), int(height * ratio))
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-            print(f"Imagem redimensionada de {width}x{height} para {new_size[0]}x{new_size[1]}")
-        
-        # CORREÇÃO 2: Converter para RGB se necessário
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        frame = np.array(image)
-        return frame
-        
+        return motor.processar_imagem(jpeg_de_base64(imagem_base64))
     except Exception as e:
         print(f"Erro ao processar imagem: {e}")
         raise
 
-def criar_alert(dados_alert):
+def salvar_alertas(alertas):
+    """Grava alertas novos ou alterados no estado compartilhado e, em worker único, em alerts.json."""
+    for alert in alertas:
+        estado.hset('alerts', str(alert['id']), alert)
+    if not coordenador.distribuido:
+        salvar_json(ARQUIVOS['alerts'], sistema['alerts'][:ALERTAS_PERSISTIDOS])
+
+def sincronizar_alertas():
+    """
+    Corta o estado compartilhado nos alertas mais recentes e mescla na lista
+    local os gravados por outros workers; os deste worker mantêm a cópia local.
+    """
+    remotos = estado.hgetall('alerts')
+    ids = sorted((int(alert_id) for alert_id in remotos), reverse=True)
+    if len(ids) > ALERTAS_PERSISTIDOS:
+        estado.hdel('alerts', *(str(alert_id) for alert_id in ids[ALERTAS_PERSISTIDOS:]))
+    if not coordenador.distribuido:
+        return
+    
+    with lock_alertas:
+        alertas = {alert['id']: alert for alert in sistema['alerts']}
+        for alert_id in ids[:ALERTAS_PERSISTIDOS]:
+            remoto = remotos[str(alert_id)]
+            if alert_id not in alertas or remoto.get('worker') != config.WORKER_ID:
+                alertas[alert_id] = remoto
+        sistema['alerts'] = sorted(alertas.values(), key=lambda a: a['id'], reverse=True)[:1000]
+
+def criar_alert(dados_alert, salvar=True):
     """Cria e salva um novo alerta."""
+    # Id de um contador no estado compartilhado: único entre workers e sem repetir após o corte
     alert = {
-        'id': len(sistema['alerts']) + 1,
+        'id': estado.hincr('contadores', 'alert_id'),
         'timestamp': datetime.now().isoformat(),
+        'worker': config.WORKER_ID,
         **dados_alert
     }
     
-    sistema['alerts'].insert(0, alert)
-    sistema['alerts'] = sistema['alerts'][:1000]  # Manter apenas 1000
+    with lock_alertas:
+        sistema['alerts'].insert(0, alert)
+        sistema['alerts'] = sistema['alerts'][:1000]  # Manter apenas 1000
     
-    salvar_json(ARQUIVOS['alerts'], sistema['alerts'][:100])
+    if salvar:
+        salvar_alertas([alert])
     return alert
 
+def _campos_grupo(grupo):
+    """Campos de agrupamento exibidos no alerta (primeira/última vez, contagem, melhor captura)."""
+    melhor = grupo['best']
+    return {
+        'first_seen': datetime.fromtimestamp(grupo['first_seen']).isoformat(),
+        'last_seen': datetime.fromtimestamp(grupo['last_seen']).isoformat(),
+        'count': grupo['count'],
+        'best_confidence': round(grupo['best_confidence'], 3),
+        'best_snapshot': {
+            'nome': melhor.get('nome'),
+            'confianca': melhor.get('confianca'),
+            'localizacao': melhor.get('localizacao', {}),
+            'timestamp': datetime.fromtimestamp(melhor['timestamp']).isoformat()
+        }
+    }
+
+def guardar_snapshot(grupo):
+    """Grava o JPEG da melhor detecção do grupo, se ainda não foi gravado."""
+    jpeg = grupo.get('best_anexo')
+    if not jpeg or jpeg is grupo.get('anexo_salvo') or grupo['alert'] is None:
+        return
+    alert = grupo['alert']
+    armazem_snapshots.guardar(alert['id'], alert['node_id'], jpeg, grupo['best']['timestamp'])
+    grupo['anexo_salvo'] = jpeg
+    alert['snapshot'] = True
+
+def registrar_deteccao(node_id, rostos, jpeg=None):
+    """
+    Registra detecções de um nó passando pelo agrupador de alertas.
+    Apenas grupos novos geram escrita em disco e broadcast; repetições
+    dentro da janela só atualizam o alerta aberto em memória. O JPEG do
+    quadro, se enviado, vira o snapshot do alerta.
+    """
+    node = sistema['nodes'].get(node_id, {})
+    if node:
+        node.setdefault('stats', {})
+        node['stats']['total_detections'] = node['stats'].get('total_detections', 0) + len(rostos)
+        node['stats']['last_detection'] = datetime.now().isoformat()
+        node['last_seen'] = datetime.now().isoformat()
+    
+    novos_alertas = []
+    for rosto in rostos:
+        face = {
+            'nome': rosto.get('nome') or 'Desconhecido',
+            'confianca': round(float(rosto.get('confianca', 0.0)), 3),
+            'localizacao': rosto.get('localizacao', {})
+        }
+        if rosto.get('track_id') is not None:
+            face['track_id'] = rosto['track_id']
+        
+        estatisticas.registrar(node_id, face['nome'])
+        
+        grupo, novo = agrupador_alertas.registrar(chave_deteccao(node_id, face), face, anexo=jpeg)
+        
+        if not novo:
+            if grupo['alert'] is not None:
+                grupo['alert'].update(_campos_grupo(grupo))
+            continue
+        
+        grupo['alert'] = criar_alert({
+            'node_id': node_id,
+            'location': node.get('location', ''),
+            'severity': 'info' if face['nome'] != 'Desconhecido' else 'warning',
+            'detected_faces': [face],
+            'status': 'aberto',
+            **_campos_grupo(grupo)
+        }, salvar=False)
+        guardar_snapshot(grupo)
+        novos_alertas.append(grupo['alert'])
+    
+    if not novos_alertas:
+        salvar_node(node_id, intervalo=config.INTERVALO_GRAVACAO_NO)
+        return []
+    
+    salvar_alertas(novos_alertas)
+    salvar_node(node_id)
+    for alert in novos_alertas:
+        try:
+            socketio.emit('new_detection', {
+                'alert': alert, 'stats': obter_stats(), 'node': node
+            }, room='dashboard')
+        except Exception as e:
+            print(f"Erro ao emitir detecção: {e}")
+    return novos_alertas
+
+def fechar_alertas_expirados():
+    """Fecha grupos cuja janela terminou: uma escrita e um broadcast por alerta agrupado."""
+    grupos = agrupador_alertas.expirar()
+    fechados = []
+    for grupo in grupos:
+        alert = grupo['alert']
+        if alert is None:
+            continue
+        alert.update(_campos_grupo(grupo))
+        alert['status'] = 'fechado'
+        guardar_snapshot(grupo)  # Melhor captura da janela, se melhorou desde a abertura
+        fechados.append(alert)
+    
+    if fechados:
+        salvar_alertas(fechados)
+        for alert in fechados:
+            try:
+                socketio.emit('alert_updated', {'alert': alert}, room='dashboard')
+            except Exception as e:
+                print(f"Erro ao emitir atualização de alerta: {e}")
+    return fechados
+
 def atualizar_stats():
-    """Atualiza estatísticas do sistema."""
-    dados = carregar_encodings()
-    sistema['stats'].update({
-        'known_faces': len(dados.get('nomes', [])),
-        'active_nodes': len([n for n in sistema['nodes'].values() if n.get('status') == 'online'])
-    })
+    """Recalcula os nós ativos; chamado apenas quando os nós mudam."""
+    sistema['stats']['active_nodes'] = len([n for n in sistema['nodes'].values() if n.get('status') == 'online'])
+
+def obter_stats():
+    """Estatísticas do dashboard em O(1), a partir dos contadores mantidos incrementalmente."""
+    if galeria.carregada:  # Não forçar a leitura da galeria antes do aquecimento
+        sistema['stats']['known_faces'] = len(galeria)
+    sistema['stats']['total_detections'] = estatisticas.total_geral()
+    return sistema['stats']
+
+def criar_no(node_id, data):
+    """Estrutura padrão de um nó recém-registrado."""
+    return {
+        'id': node_id,
+        'location': data.get('location', ''),
+        'type': data.get('type', 'camera'),
+        'url': data.get('url'),
+        'status': 'offline',
+        'last_seen': datetime.now().isoformat(),
+        'registered_at': datetime.now().isoformat(),
+        'stats': {'total_detections': 0, 'last_detection': None}
+    }
 
 # =================== ROTAS PRINCIPAIS ===================
 
 @app.route('/')
 def dashboard():
-    atualizar_stats()
     return render_template('dashboard.html', 
-                         stats=sistema['stats'],
+                         stats=obter_stats(),
                          nodes=sistema['nodes'],
                          recent_alerts=sistema['alerts'][:10])
 
@@ -197,9 +450,7 @@ def cadastrar_rosto():
             return jsonify({'erro': 'Imagem é obrigatória'}), 400
         
         print("Carregando encodings existentes...")
-        dados_conhecidos = carregar_encodings()
-        
-        if nome.lower() in [n.lower() for n in dados_conhecidos.get("nomes", [])]:
+        if galeria.obter_nome(nome):
             print(f"Erro: Nome {nome} já existe")
             return jsonify({'erro': f'Já existe pessoa com nome "{nome}"'}), 400
         
@@ -210,7 +461,7 @@ def cadastrar_rosto():
         
         print("Detectando rostos...")
         # CORREÇÃO 4: Usar parâmetros mais restritivos para detecção
-        caixas_rosto = face_recognition.face_locations(
+        caixas_rosto = motor.localizar_rostos(
             rgb_frame, 
             model='hog',  # Mais rápido e menos falsos positivos
             number_of_times_to_upsample=0  # Não aumentar resolução
@@ -221,7 +472,7 @@ def cadastrar_rosto():
         if len(caixas_rosto) > 5:
             print("Muitos rostos detectados, tentando com modelo CNN...")
             try:
-                caixas_rosto = face_recognition.face_locations(
+                caixas_rosto = motor.localizar_rostos(
                     rgb_frame, 
                     model='cnn',  # Mais preciso
                     number_of_times_to_upsample=0
@@ -254,19 +505,22 @@ def cadastrar_rosto():
             return jsonify({'erro': f'Detectados {len(caixas_rosto)} rostos. Certifique-se de que há apenas uma pessoa na imagem.'}), 400
         
         print("Gerando encodings...")
-        encodings_rosto = face_recognition.face_encodings(rgb_frame, caixas_rosto)
+        encodings_rosto = motor.gerar_encodings(rgb_frame, caixas_rosto)
         
         if len(encodings_rosto) == 1:
             print("Salvando dados...")
-            dados_conhecidos["encodings"].append(encodings_rosto[0])
-            dados_conhecidos["nomes"].append(nome)
-            salvar_encodings(dados_conhecidos)
+            try:
+                versao = galeria.adicionar(nome, encodings_rosto[0])
+            except ValueError:
+                # Outro worker cadastrou o mesmo nome depois da verificação inicial
+                print(f"Erro: Nome {nome} já existe")
+                return jsonify({'erro': f'Já existe pessoa com nome "{nome}"'}), 400
             
             print("Enviando notificações...")
             # Notificações (com tratamento de erro)
             try:
                 socketio.emit('face_database_updated', {
-                    'action': 'added', 'name': nome, 'total_faces': len(dados_conhecidos["nomes"])
+                    'action': 'added', 'name': nome, 'total_faces': len(galeria), 'version': versao
                 }, room='nodes')
                 
                 socketio.emit('system_update', {
@@ -288,33 +542,28 @@ def cadastrar_rosto():
         traceback.print_exc()
         return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
 
-@app.route('/api/reconhecer', methods=['POST'])
-def reconhecer_rosto():
-    try:
-        data = request.get_json()
-        imagem_base64 = data.get('imagem')
-        
-        if not imagem_base64:
-            return jsonify({'erro': 'Imagem é obrigatória'}), 400
-        
-        dados_conhecidos = carregar_encodings()
-        known_encodings = dados_conhecidos.get("encodings", [])
-        known_names = dados_conhecidos.get("nomes", [])
-        
-        if not known_encodings:
-            return jsonify({'rostos': []})
-        
-        rgb_frame = processar_imagem_base64(imagem_base64)
-        face_locations = face_recognition.face_locations(rgb_frame, model='hog', number_of_times_to_upsample=0)
-        
-        if not face_locations:
-            return jsonify({'rostos': []})
-        
-        face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-        
-        resultados = []
+def reconhecer_quadro(rgb_frame):
+    """Detecta e identifica os rostos de um quadro RGB contra a galeria."""
+    dados_conhecidos = carregar_encodings()
+    known_encodings = dados_conhecidos.get("encodings", [])
+    known_names = dados_conhecidos.get("nomes", [])
+    
+    if not known_encodings:
+        return []
+    
+    with monitor_carga.etapa('deteccao'):
+        face_locations = motor.localizar_rostos(rgb_frame, model='hog', number_of_times_to_upsample=0)
+    
+    if not face_locations:
+        return []
+    
+    with monitor_carga.etapa('encoding'):
+        face_encodings = motor.gerar_encodings(rgb_frame, face_locations)
+    
+    resultados = []
+    with monitor_carga.etapa('comparacao'):
         for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-            matches = face_recognition.compare_faces(known_encodings, face_encoding, tolerance=0.6)
+            matches = motor.comparar_rostos(known_encodings, face_encoding, tolerance=0.6)
             name = "Desconhecido"
             
             if True in matches:
@@ -324,11 +573,39 @@ def reconhecer_rosto():
                 'nome': name,
                 'localizacao': {'top': int(top), 'right': int(right), 'bottom': int(bottom), 'left': int(left)}
             })
+    return resultados
+
+def processar_quadro_stream(quadro):
+    """Processa um quadro do canal de streaming: bytes JPEG crus ou data URL base64."""
+    with monitor_carga.requisicao('stream'):
+        with monitor_carga.etapa('decodificacao'):
+            if isinstance(quadro, (bytes, bytearray)):
+                rgb_frame = motor.processar_imagem(bytes(quadro))
+            else:
+                rgb_frame = processar_imagem_base64(quadro)
+        rostos = reconhecer_quadro(rgb_frame)
+    return {'rostos': rostos, 'dicas': monitor_carga.dicas('stream', *BASE_STREAM)}
+
+@app.route('/api/reconhecer', methods=['POST'])
+def reconhecer_rosto():
+    try:
+        data = request.get_json()
+        imagem_base64 = data.get('imagem')
+        
+        if not imagem_base64:
+            return jsonify({'erro': 'Imagem é obrigatória', 'dicas': monitor_carga.dicas('reconhecer', *BASE_RECONHECER)}), 400
         
-        return jsonify({'rostos': resultados})
+        with monitor_carga.requisicao('reconhecer'):
+            resultados = []
+            if carregar_encodings().get("encodings"):
+                with monitor_carga.etapa('decodificacao'):
+                    rgb_frame = processar_imagem_base64(imagem_base64)
+                resultados = reconhecer_quadro(rgb_frame)
+        
+        return jsonify({'rostos': resultados, 'dicas': monitor_carga.dicas('reconhecer', *BASE_RECONHECER)})
         
     except Exception as e:
-        return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+        return jsonify({'erro': f'Erro interno: {str(e)}', 'dicas': monitor_carga.dicas('reconhecer', *BASE_RECONHECER)}), 500
 
 @app.route('/api/detectar_rosto', methods=['POST'])
 def detectar_rosto():
@@ -337,16 +614,19 @@ def detectar_rosto():
         imagem_base64 = data.get('imagem')
         
         if not imagem_base64:
-            return jsonify({'erro': 'Imagem é obrigatória'}), 400
+            return jsonify({'erro': 'Imagem é obrigatória', 'dicas': monitor_carga.dicas('detectar', *BASE_DETECTAR)}), 400
         
-        rgb_frame = processar_imagem_base64(imagem_base64)
-        
-        # Usar mesmos parâmetros melhorados
-        face_locations = face_recognition.face_locations(
-            rgb_frame, 
-            model='hog', 
-            number_of_times_to_upsample=0
-        )
+        with monitor_carga.requisicao('detectar'):
+            with monitor_carga.etapa('decodificacao'):
+                rgb_frame = processar_imagem_base64(imagem_base64)
+            
+            # Usar mesmos parâmetros melhorados
+            with monitor_carga.etapa('deteccao'):
+                face_locations = motor.localizar_rostos(
+                    rgb_frame, 
+                    model='hog', 
+                    number_of_times_to_upsample=0
+                )
         
         # Filtrar rostos pequenos
         if len(face_locations) > 3:
@@ -361,16 +641,143 @@ def detectar_rosto():
         
         resultados = [{'localizacao': {'top': int(top), 'right': int(right), 'bottom': int(bottom), 'left': int(left)}} for (top, right, bottom, left) in face_locations]
         
-        return jsonify({'rostos': resultados})
+        return jsonify({'rostos': resultados, 'dicas': monitor_carga.dicas('detectar', *BASE_DETECTAR)})
         
     except Exception as e:
-        return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+        return jsonify({'erro': f'Erro interno: {str(e)}', 'dicas': monitor_carga.dicas('detectar', *BASE_DETECTAR)}), 500
+
+@app.route('/api/alerts/<int:alert_id>/snapshot')
+def api_alert_snapshot(alert_id):
+    """JPEG da melhor detecção do alerta, lido direto do segmento do worker que o criou."""
+    alert = estado.hget('alerts', str(alert_id)) or {}
+    worker = alert.get('worker')
+    if worker and worker != coordenador.worker_id and worker in coordenador.membros:
+        url = coordenador.membros[worker].get('url')
+        if url:
+            return redirect(url.rstrip('/') + request.path, code=307)
+    
+    jpeg = armazem_snapshots.ler(alert_id)
+    if jpeg is None:
+        return jsonify({'erro': 'Snapshot não encontrado'}), 404
+    return Response(jpeg, content_type='image/jpeg', headers={
+        'Cache-Control': 'private, max-age=86400'
+    })
+
+@app.route('/api/snapshots')
+def api_listar_snapshots():
+    """Índice de snapshots filtrado por ?node_id=, ?desde= e ?ate= (epoch em segundos)."""
+    return jsonify({
+        'snapshots': armazem_snapshots.listar(
+            node_id=request.args.get('node_id'),
+            desde=request.args.get('desde', type=float),
+            ate=request.args.get('ate', type=float),
+            limite=min(request.args.get('limite', 50, type=int), 500)
+        ),
+        'armazem': armazem_snapshots.resumo()
+    })
+
+@app.route('/api/stats/timeseries')
+def api_stats_timeseries():
+    """
+    Detecções por intervalo: ?granularidade=minuto|hora, ?buckets=N e,
+    opcionalmente, ?node_id= ou ?nome= para a série de um nó ou identidade.
+    """
+    granularidade = request.args.get('granularidade', 'minuto')
+    if granularidade not in GRANULARIDADES:
+        return jsonify({'erro': f'Granularidade deve ser uma de: {", ".join(GRANULARIDADES)}'}), 400
+    
+    buckets = request.args.get('buckets', 60, type=int)
+    node_id = request.args.get('node_id')
+    nome = request.args.get('nome')
+    return jsonify({
+        'granularidade': granularidade,
+        'largura_s': GRANULARIDADES[granularidade][0],
+        'node_id': node_id,
+        'nome': nome,
+        'pontos': estatisticas.serie(granularidade, max(1, buckets), node_id=node_id, nome=nome),
+        'totais': estatisticas.totais_atuais()
+    })
+
+@app.route('/api/stream/sessoes')
+def api_stream_sessoes():
+    """Contadores de atraso e descarte de cada sessão de streaming aberta neste worker."""
+    return jsonify({'sessoes': canal_streaming.resumo()})
+
+@app.route('/api/pronto')
+def api_pronto():
+    """
+    Prontidão do reconhecimento: 200 quando modelos e galeria estão aquecidos,
+    503 antes. Sem aquecimento (modo 'sob_demanda') o worker está sempre pronto
+    e `pronto` indica apenas se a pilha já foi carregada por alguma requisição.
+    """
+    status = motor.status()
+    return jsonify(status), 200 if status['pronto'] or status['modo'] == 'sob_demanda' else 503
+
+@app.route('/api/carga')
+def api_carga():
+    """Carga atual de reconhecimento e dicas que os clientes estão recebendo."""
+    return jsonify({
+        'carga': monitor_carga.resumo(),
+        'dicas_reconhecer': monitor_carga.dicas('reconhecer', *BASE_RECONHECER),
+        'dicas_detectar': monitor_carga.dicas('detectar', *BASE_DETECTAR),
+        'dicas_stream': monitor_carga.dicas('stream', *BASE_STREAM)
+    })
 
 @app.route('/api/pessoas')
 def listar_pessoas():
     dados = carregar_encodings()
     return jsonify({'pessoas': dados.get('nomes', [])})
 
+@app.route('/api/pessoas/<nome>', methods=['DELETE'])
+def remover_pessoa(nome):
+    try:
+        versao = galeria.remover(nome)
+    except KeyError:
+        return jsonify({'erro': 'Pessoa não encontrada'}), 404
+    
+    socketio.emit('face_database_updated', {
+        'action': 'removed', 'name': nome, 'total_faces': len(galeria), 'version': versao
+    }, room='nodes')
+    return jsonify({'sucesso': f'{nome} removido', 'versao': versao})
+
+def responder_galeria(mudancas):
+    """Serializa mudanças da galeria em JSON ou, com ?formato=binario, em quadros do protocolo."""
+    if request.args.get('formato') == 'binario':
+        quadros = []
+        for acao, chave in (('added', 'adicionados'), ('updated', 'atualizados'), ('removed', 'removidos')):
+            for item in mudancas[chave]:
+                quadros.append(protocols.codificar({
+                    'tipo': 'galeria', 'versao': item.get('versao', mudancas['versao']),
+                    'acao': acao, 'nome': item['nome'], 'encoding': item.get('encoding')
+                }))
+        return Response(b''.join(quadros), content_type='application/octet-stream', headers={
+            'X-Galeria-Versao': str(mudancas['versao']),
+            'X-Galeria-Completo': '1' if mudancas['completo'] else '0'
+        })
+    
+    for chave in ('adicionados', 'atualizados'):
+        mudancas[chave] = [
+            {**item, 'encoding': [float(x) for x in item['encoding']]} for item in mudancas[chave]
+        ]
+    return jsonify(mudancas)
+
+@app.route('/api/galeria/versao')
+def galeria_versao():
+    galeria.sincronizar()
+    return jsonify({'versao': galeria.versao, 'total': len(galeria)})
+
+@app.route('/api/galeria/mudancas')
+def galeria_mudancas():
+    """Adições, atualizações e remoções desde ?desde=V (snapshot completo se V for antiga demais)."""
+    desde = request.args.get('desde', 0, type=int)
+    galeria.sincronizar()
+    return responder_galeria(galeria.mudancas_desde(desde))
+
+@app.route('/api/galeria/snapshot')
+def galeria_snapshot():
+    galeria.sincronizar()
+    return responder_galeria(galeria.snapshot())
+
 # =================== APIs DOS NÓS ===================
 
 @app.route('/api/nodes', methods=['GET'])
@@ -382,6 +789,19 @@ def api_get_nodes():
         'offline': len([n for n in sistema['nodes'].values() if n.get('status') == 'offline'])
     })
 
+@app.route('/api/cluster')
+def api_cluster():
+    """Workers vivos e quantos nós pertencem a cada um."""
+    distribuicao = {worker_id: 0 for worker_id in coordenador.membros}
+    for node_id in sistema['nodes']:
+        dono = coordenador.dono(node_id)
+        distribuicao[dono] = distribuicao.get(dono, 0) + 1
+    return jsonify({
+        'worker_id': coordenador.worker_id,
+        'workers': coordenador.membros,
+        'nodes_por_worker': distribuicao
+    })
+
 @app.route('/api/nodes', methods=['POST'])
 def api_add_node():
     data = request.get_json()
@@ -389,22 +809,18 @@ def api_add_node():
     
     if not node_id:
         return jsonify({'erro': 'ID do nó é obrigatório'}), 400
+    
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     if node_id in sistema['nodes']:
         return jsonify({'erro': 'Nó já existe'}), 400
     
-    novo_no = {
-        'id': node_id,
-        'location': data.get('location', ''),
-        'type': data.get('type', 'camera'),
-        'url': data.get('url'),
-        'status': 'offline',
-        'last_seen': datetime.now().isoformat(),
-        'registered_at': datetime.now().isoformat(),
-        'stats': {'total_detections': 0, 'last_detection': None}
-    }
+    novo_no = criar_no(node_id, data)
     
     sistema['nodes'][node_id] = novo_no
-    salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    salvar_node(node_id)
     
     socketio.emit('node_registered', {'node': novo_no}, room='dashboard')
     return jsonify({'sucesso': 'Nó adicionado com sucesso', 'node': novo_no})
@@ -414,6 +830,10 @@ def api_update_node(node_id):
     if node_id not in sistema['nodes']:
         return jsonify({'erro': 'Nó não encontrado'}), 404
     
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     data = request.get_json()
     node = sistema['nodes'][node_id]
     
@@ -422,7 +842,7 @@ def api_update_node(node_id):
             node[campo] = data[campo]
     
     node['updated_at'] = datetime.now().isoformat()
-    salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    salvar_node(node_id)
     
     socketio.emit('node_updated', {'node': node}, room='dashboard')
     return jsonify({'sucesso': 'Nó atualizado com sucesso', 'node': node})
@@ -432,8 +852,11 @@ def api_delete_node(node_id):
     if node_id not in sistema['nodes']:
         return jsonify({'erro': 'Nó não encontrado'}), 404
     
-    del sistema['nodes'][node_id]
-    salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
+    remover_node(node_id)
     
     socketio.emit('node_removed', {'node_id': node_id}, room='dashboard')
     return jsonify({'sucesso': 'Nó removido com sucesso'})
@@ -443,6 +866,10 @@ def api_node_stream(node_id):
     if node_id not in sistema['nodes']:
         return jsonify({'erro': 'Nó não encontrado'}), 404
     
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     node = sistema['nodes'][node_id]
     camera_url = node.get('url')
     
@@ -456,7 +883,7 @@ def api_node_stream(node_id):
         requests.get(camera_url.replace('/video', '/'), timeout=3)
         
         node.update({'status': 'online', 'last_seen': datetime.now().isoformat()})
-        salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+        salvar_node(node_id)
         
         socketio.emit('node_status_changed', {'node_id': node_id, 'status': 'online', 'node': node}, room='dashboard')
         
@@ -469,7 +896,7 @@ def api_node_stream(node_id):
         
     except Exception as e:
         node['status'] = 'offline'
-        salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+        salvar_node(node_id)
         
         socketio.emit('node_status_changed', {'node_id': node_id, 'status': 'offline', 'node': node}, room='dashboard')
         return jsonify({'erro': f'Câmera não acessível: {str(e)}'}), 503
@@ -479,6 +906,10 @@ def api_proxy_stream(node_id):
     if node_id not in sistema['nodes']:
         return "Nó não encontrado", 404
     
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     camera_url = sistema['nodes'][node_id].get('url')
     if not camera_url:
         return "URL não configurada", 400
@@ -540,11 +971,15 @@ def api_toggle_node_status(node_id):
     if node_id not in sistema['nodes']:
         return jsonify({'erro': 'Nó não encontrado'}), 404
     
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     node = sistema['nodes'][node_id]
     new_status = 'offline' if node.get('status') == 'online' else 'online'
     
     node.update({'status': new_status, 'last_seen': datetime.now().isoformat()})
-    salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    salvar_node(node_id)
     
     socketio.emit('node_status_changed', {'node_id': node_id, 'status': new_status, 'node': node}, room='dashboard')
     return jsonify({'sucesso': f'Status alterado para {new_status}', 'node': node})
@@ -554,6 +989,10 @@ def api_restart_node(node_id):
     if node_id not in sistema['nodes']:
         return jsonify({'erro': 'Nó não encontrado'}), 404
     
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
     node = sistema['nodes'][node_id]
     
     # Marcar como reiniciando
@@ -561,7 +1000,7 @@ def api_restart_node(node_id):
         'status': 'restarting', 
         'last_seen': datetime.now().isoformat()
     })
-    salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+    salvar_node(node_id)
     
     # Notificar mudança de status
     socketio.emit('node_status_changed', {
@@ -578,7 +1017,7 @@ def api_restart_node(node_id):
                 'status': 'offline',
                 'last_seen': datetime.now().isoformat()
             })
-            salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+            salvar_node(node_id)
             socketio.emit('node_status_changed', {
                 'node_id': node_id, 
                 'status': 'offline', 
@@ -591,6 +1030,39 @@ def api_restart_node(node_id):
     
     return jsonify({'sucesso': f'Nó {node_id} será reiniciado', 'node': node})
 
+@app.route('/api/nodes/<node_id>/deteccoes', methods=['POST'])
+def api_node_deteccoes(node_id):
+    """Recebe detecções de um nó, em JSON ou no protocolo binário (shared/protocols.py)."""
+    if node_id not in sistema['nodes']:
+        return jsonify({'erro': 'Nó não encontrado'}), 404
+    
+    resposta_dono = redirecionar_para_dono(node_id)
+    if resposta_dono:
+        return resposta_dono
+    
+    try:
+        dados = request.get_data()
+        if protocols.eh_binario(dados):
+            mensagem = protocols.decodificar(dados)
+            if mensagem['tipo'] != 'deteccao':
+                return jsonify({'erro': 'Mensagem deve ser do tipo deteccao'}), 400
+            rostos, jpeg = mensagem['rostos'], mensagem['jpeg']
+        else:
+            payload = request.get_json(silent=True) or {}
+            rostos = payload.get('rostos', [])
+            jpeg = jpeg_de_base64(payload['imagem']) if payload.get('imagem') else None
+        
+        novos = registrar_deteccao(node_id, rostos, jpeg)
+        return jsonify({
+            'sucesso': 'Detecções registradas',
+            'novos_alertas': [a['id'] for a in novos],
+            'agrupadas': len(rostos) - len(novos)
+        })
+    except protocols.ErroProtocolo as e:
+        return jsonify({'erro': f'Mensagem inválida: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'erro': f'Erro interno: {str(e)}'}), 500
+
 # =================== WEBSOCKET EVENTS ===================
 
 @socketio.on('connect')
@@ -610,6 +1082,7 @@ def handle_connect():
 def handle_disconnect():
     try:
         print(f"🔌 Cliente desconectado: {request.sid}")
+        canal_streaming.fechar(request.sid)
         # Marcar nó como offline se desconectou
         for node_id, node_data in list(sistema['nodes'].items()):
             if node_data.get('session_id') == request.sid:
@@ -617,7 +1090,7 @@ def handle_disconnect():
                     'status': 'offline', 
                     'last_seen': datetime.now().isoformat()
                 })
-                salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+                salvar_node(node_id)
                 try:
                     socketio.emit('node_status_changed', {
                         'node_id': node_id, 
@@ -642,9 +1115,8 @@ def handle_ping():
 def handle_join_dashboard():
     try:
         join_room('dashboard')
-        atualizar_stats()
         emit('dashboard_joined', {
-            'stats': sistema['stats'],
+            'stats': obter_stats(),
             'nodes': sistema['nodes'],
             'alerts': sistema['alerts'][:10]
         })
@@ -652,6 +1124,75 @@ def handle_join_dashboard():
     except Exception as e:
         print(f"❌ Erro ao entrar no dashboard: {e}")
 
+@socketio.on('stream_abrir')
+def handle_stream_abrir(dados=None):
+    """Abre a sessão de streaming da conexão; os resultados chegam em 'stream_resultado'."""
+    canal_streaming.abrir(request.sid)
+    emit('stream_aberto', {'sessao': request.sid, 'dicas': monitor_carga.dicas('stream', *BASE_STREAM)})
+
+@socketio.on('stream_frame')
+def handle_stream_frame(dados):
+    """Recebe {'seq', 'imagem'}; só enfileira, o processamento é feito pelo pool do canal."""
+    try:
+        if not canal_streaming.receber(request.sid, int(dados.get('seq', 0)), dados.get('imagem')):
+            if not canal_streaming.aberta(request.sid):
+                emit('stream_erro', {'erro': 'Sessão de streaming não aberta'})
+    except (TypeError, ValueError, AttributeError) as e:
+        emit('stream_erro', {'erro': f'Quadro inválido: {str(e)}'})
+
+@socketio.on('stream_fechar')
+def handle_stream_fechar():
+    emit('stream_fechado', {'contadores': canal_streaming.fechar(request.sid)})
+
+@socketio.on('node_message')
+def handle_node_message(dados):
+    """Mensagens binárias dos nós de câmera: registro, heartbeat e detecções."""
+    try:
+        mensagem = protocols.decodificar(dados)
+        node_id = mensagem['node_id']
+        tipo = mensagem['tipo']
+        
+        if not coordenador.eh_dono(node_id):
+            emit('node_redirect', {'node_id': node_id, 'worker_url': coordenador.url_do_dono(node_id)})
+            return
+        
+        if tipo == 'registro':
+            join_room('nodes')
+            node = sistema['nodes'].setdefault(node_id, criar_no(node_id, mensagem))
+            node.update({
+                'location': mensagem['location'] or node.get('location', ''),
+                'type': mensagem['type'],
+                'url': mensagem['url'] or node.get('url'),
+                'status': 'online',
+                'last_seen': datetime.now().isoformat(),
+                'session_id': request.sid
+            })
+            salvar_node(node_id)
+            socketio.emit('node_status_changed', {'node_id': node_id, 'status': 'online', 'node': node}, room='dashboard')
+            emit('node_registered_ack', {'node_id': node_id, 'protocol_version': protocols.VERSAO_PROTOCOLO})
+            return
+        
+        node = sistema['nodes'].get(node_id)
+        if node is None:
+            emit('node_error', {'erro': f'Nó {node_id} não registrado'})
+            return
+        
+        if tipo == 'heartbeat':
+            estava_offline = node.get('status') != 'online'
+            node.update({'status': 'online', 'last_seen': datetime.now().isoformat(), 'fps': round(mensagem['fps'], 1)})
+            if estava_offline:
+                salvar_node(node_id)
+                socketio.emit('node_status_changed', {'node_id': node_id, 'status': 'online', 'node': node}, room='dashboard')
+            else:
+                # last_seen precisa chegar ao estado para os outros workers não verem o nó parado
+                salvar_node(node_id, intervalo=config.INTERVALO_GRAVACAO_NO)
+        elif tipo == 'deteccao':
+            registrar_deteccao(node_id, mensagem['rostos'], mensagem['jpeg'])
+    except protocols.ErroProtocolo as e:
+        emit('node_error', {'erro': f'Mensagem inválida: {str(e)}'})
+    except Exception as e:
+        print(f"❌ Erro na mensagem do nó: {e}")
+
 @socketio.on_error_default
 def default_error_handler(e):
     print(f"🚨 Erro WebSocket: {e}")
@@ -670,6 +1211,8 @@ def monitor_nodes():
             nodes_to_update = []
             
             for node_id, node_data in list(sistema['nodes'].items()):  # Usar list() para evitar RuntimeError
+                if not coordenador.eh_dono(node_id):
+                    continue  # Cada nó é monitorado apenas pelo worker dono
                 if node_data.get('status') == 'online':
                     try:
                         last_seen_str = node_data.get('last_seen', now.isoformat())
@@ -686,8 +1229,8 @@ def monitor_nodes():
                         node_data['last_seen'] = now.isoformat()
             
             # Salvar mudanças
-            if nodes_to_update:
-                salvar_json(ARQUIVOS['nodes'], sistema['nodes'])
+            for node_id, _ in nodes_to_update:
+                salvar_node(node_id)
             
             # Notificar mudanças (com tratamento de erro)
             for node_id, node_data in nodes_to_update:
@@ -716,24 +1259,98 @@ def monitor_nodes():
             else:
                 time.sleep(10)  # Pausa menor para tentar novamente
 
+def monitor_alertas():
+    """Fecha periodicamente os alertas agrupados cuja janela expirou."""
+    while True:
+        try:
+            fechar_alertas_expirados()
+            removidos = armazem_snapshots.aplicar_retencao()
+            if removidos:
+                print(f"🧹 {len(removidos)} segmento(s) de snapshots removidos pela retenção")
+        except Exception as e:
+            print(f"Erro no monitor de alertas: {e}")
+        time.sleep(config.INTERVALO_FECHAMENTO_ALERTAS)
+
+def manter_cluster():
+    """Batimentos do worker e redistribuição dos nós quando workers entram ou morrem."""
+    while True:
+        try:
+            if coordenador.batimento():
+                print(f"🔁 Membros do cluster: {sorted(coordenador.membros)}")
+            remotos = estado.hgetall('nodes')
+            assumidos, perdidos = coordenador.rebalancear(set(sistema['nodes']) | set(remotos))
+            sincronizar_nodes(remotos, assumidos)
+            sincronizar_alertas()
+            if galeria.carregada:  # Sem forçar a leitura antes do aquecimento/primeiro uso
+                galeria.sincronizar()
+            
+            for node_id in perdidos:
+                node = sistema['nodes'].get(node_id, {})
+                if node.get('session_id'):
+                    socketio.emit('node_redirect', {
+                        'node_id': node_id, 'worker_url': coordenador.url_do_dono(node_id)
+                    }, to=node['session_id'])
+            
+            for node_id in assumidos:
+                sistema['nodes'][node_id]['worker'] = coordenador.worker_id
+                salvar_node(node_id)
+            if assumidos:
+                print(f"📥 {len(assumidos)} nó(s) assumidos por {coordenador.worker_id}")
+        except Exception as e:
+            print(f"Erro na manutenção do cluster: {e}")
+        time.sleep(config.INTERVALO_BATIMENTO)
+
+def persistir_estatisticas():
+    """Grava periodicamente as séries de detecções (apenas se mudaram)."""
+    while True:
+        time.sleep(intervalo_estatisticas)
+        try:
+            estatisticas.salvar()
+        except Exception as e:
+            print(f"Erro ao salvar estatísticas: {e}")
+
 # CORREÇÃO: Inicialização com thread daemon
 def init_system():
     """Inicialização do sistema com monitor de nós."""
     try:
+        if config.AQUECER_RECONHECIMENTO:
+            motor.iniciar_aquecimento(galeria)
+        
         sistema['nodes'] = carregar_json(ARQUIVOS['nodes'])
         sistema['alerts'] = carregar_json(ARQUIVOS['alerts'], [])
+        estatisticas.carregar()
         
         # Marcar todos os nós como offline na inicialização
         for node_data in sistema['nodes'].values():
             node_data['status'] = 'offline'
             node_data['last_seen'] = datetime.now().isoformat()
         
+        coordenador.batimento()
+        # Nós já presentes no estado compartilhado foram gravados por seus donos e são mais recentes
+        remotos = estado.hgetall('nodes')
+        sistema['nodes'].update(remotos)
+        for node_id in set(sistema['nodes']) - set(remotos):
+            salvar_node(node_id)
+        
+        # O contador de ids compartilhado não pode ficar atrás dos alertas já gravados em disco
+        maior_id = max((alert['id'] for alert in sistema['alerts']), default=0)
+        atual = estado.hget('contadores', 'alert_id', 0)
+        if maior_id > atual:
+            estado.hincr('contadores', 'alert_id', maior_id - atual)
+        sincronizar_alertas()
+        
         atualizar_stats()
         
+        threading.Thread(target=manter_cluster, daemon=True).start()
+        
         # Iniciar monitor em thread daemon
         monitor_thread = threading.Thread(target=monitor_nodes, daemon=True)
         monitor_thread.start()
         
+        threading.Thread(target=monitor_alertas, daemon=True).start()
+        threading.Thread(target=persistir_estatisticas, daemon=True).start()
+        canal_streaming.iniciar()
+        
         print("🚀 Sistema distribuído inicializado com monitor!")
     except Exception as e:
         print(f"Erro na inicialização: {e}")
@@ -744,22 +1361,24 @@ if __name__ == '__main__':
         print("=== INICIANDO SISTEMA MELHORADO ===")
         init_system()
         
-        print("🌐 Servidor: http://127.0.0.1:5000")
-        print("📱 Web: http://127.0.0.1:5000/web")
-        print("📊 Dashboard: http://127.0.0.1:5000/")
-        print("📡 Nós: http://127.0.0.1:5000/nodes")
+        print(f"🌐 Servidor: {config.WORKER_URL} (worker {config.WORKER_ID})")
+        print(f"📱 Web: {config.WORKER_URL}/web")
+        print(f"📊 Dashboard: {config.WORKER_URL}/")
+        print(f"📡 Nós: {config.WORKER_URL}/nodes")
         print("⚠️  WebSocket: APENAS polling (máxima estabilidade)")
         
         # Configuração otimizada para estabilidade
         socketio.run(app, 
                     debug=False,
-                    host='127.0.0.1',
-                    port=5000, 
+                    host=config.HOST,
+                    port=config.PORTA, 
                     use_reloader=False,
                     log_output=False,
                     allow_unsafe_werkzeug=True)
                     
     except KeyboardInterrupt:
+        coordenador.sair()
+        estatisticas.salvar()
         print("\n=== SERVIDOR PARADO ===")
     except Exception as e:
         print(f"=== ERRO CRÍTICO: {e} ===")
@@ -0,0 +1,58 @@
+# servidor-central/config.py
+"""Configurações do servidor, sobrescrevíveis por variáveis de ambiente."""
+import os
+import socket
+
+# Detecções da mesma pessoa no mesmo nó dentro desta janela (segundos)
+# são fundidas em um único alerta
+JANELA_ALERTAS = float(os.environ.get('JANELA_ALERTAS', 60))
+
+# Intervalo de verificação de grupos de alerta expirados (segundos)
+INTERVALO_FECHAMENTO_ALERTAS = float(os.environ.get('INTERVALO_FECHAMENTO_ALERTAS', 5))
+
+# =================== MODO MULTI-WORKER ===================
+
+HOST = os.environ.get('HOST', '127.0.0.1')
+PORTA = int(os.environ.get('PORTA', 5000))
+
+# Identificador e URL pública deste worker (usada para redirecionar nós a seu dono)
+WORKER_ID = os.environ.get('WORKER_ID', f'{socket.gethostname()}-{PORTA}')
+WORKER_URL = os.environ.get('WORKER_URL', f'http://{HOST}:{PORTA}')
+
+# Estado compartilhado: 'memoria://' (processo único) ou 'redis://host:6379/0'
+ESTADO_URL = os.environ.get('ESTADO_URL', 'memoria://')
+
+# Fila do Socket.IO entre workers: vazio (sem fila), 'local://' (em processo,
+# para testes) ou uma URL suportada pelo Flask-SocketIO (redis://, amqp://, kafka://)
+FILA_MENSAGENS = os.environ.get('FILA_MENSAGENS') or None
+
+# Batimentos: um worker sem batimento por TTL_WORKER segundos perde seus nós
+INTERVALO_BATIMENTO = float(os.environ.get('INTERVALO_BATIMENTO', 5))
+TTL_WORKER = float(os.environ.get('TTL_WORKER', 15))
+VNODES_ANEL = int(os.environ.get('VNODES_ANEL', 64))
+
+# Intervalo mínimo entre gravações de um nó por heartbeats/detecções (segundos);
+# deve ficar bem abaixo dos 90 s sem sinal que marcam o nó como offline
+INTERVALO_GRAVACAO_NO = float(os.environ.get('INTERVALO_GRAVACAO_NO', 30))
+
+# =================== CARGA E DICAS AOS CLIENTES ===================
+
+# Requisições de reconhecimento simultâneas que o servidor atende sem fila
+CAPACIDADE_RECONHECIMENTO = int(os.environ.get('CAPACIDADE_RECONHECIMENTO', 2))
+
+# Latência total desejada por quadro; acima dela os clientes são desacelerados
+LATENCIA_ALVO_MS = float(os.environ.get('LATENCIA_ALVO_MS', 300))
+
+# Aquecer o reconhecimento (modelos, galeria, inferência de teste) em segundo
+# plano na inicialização; desligar em processos que só servem dashboard/nós
+AQUECER_RECONHECIMENTO = os.environ.get('AQUECER_RECONHECIMENTO', '1') != '0'
+
+# =================== SNAPSHOTS DAS DETECÇÕES ===================
+
+SNAPSHOTS_SEGMENTO_MB = int(os.environ.get('SNAPSHOTS_SEGMENTO_MB', 16))
+SNAPSHOTS_RETENCAO_HORAS = float(os.environ.get('SNAPSHOTS_RETENCAO_HORAS', 24 * 7))
+SNAPSHOTS_MAX_MB = int(os.environ.get('SNAPSHOTS_MAX_MB', 512))
+
+# Intervalo de gravação das séries de detecções em data/stats.json (segundos);
+# com estado externo os incrementos são enviados a cada INTERVALO_BATIMENTO
+INTERVALO_PERSISTENCIA_STATS = float(os.environ.get('INTERVALO_PERSISTENCIA_STATS', 60))
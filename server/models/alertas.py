@@ -0,0 +1,100 @@
+# servidor-central/models/alertas.py
+"""Agrupamento de detecções repetidas em um único alerta por janela de tempo."""
+import threading
+import time
+
+NOME_DESCONHECIDO = 'Desconhecido'
+
+
+def chave_deteccao(node_id, rosto):
+    """
+    Chave de agrupamento: (nó, identidade). Rostos desconhecidos usam o
+    `track_id` enviado pelo nó, se houver, para não fundir pessoas diferentes.
+    """
+    nome = rosto.get('nome') or NOME_DESCONHECIDO
+    if nome == NOME_DESCONHECIDO and rosto.get('track_id') is not None:
+        return (node_id, f"track:{rosto['track_id']}")
+    return (node_id, nome)
+
+
+class AgrupadorAlertas:
+    """
+    Funde detecções da mesma chave enquanto chegarem dentro de `janela`
+    segundos da anterior. Só a primeira detecção de um grupo deve virar
+    escrita em disco e broadcast; as seguintes apenas atualizam o grupo em
+    memória até ele expirar.
+    """
+
+    def __init__(self, janela=60.0, max_grupos=10000):
+        self.janela = janela
+        self.max_grupos = max_grupos
+        self._grupos = {}
+        self._deslocados = []  # grupos encerrados fora de expirar(), entregues na próxima varredura
+        self._lock = threading.Lock()
+        self.stats = {'deteccoes': 0, 'grupos_abertos': 0, 'grupos_fechados': 0}
+
+    def registrar(self, chave, rosto, agora=None, anexo=None):
+        """
+        Registra uma detecção. Retorna (grupo, novo); `novo` indica que um
+        grupo foi aberto e o chamador deve criar/anunciar o alerta. O `anexo`
+        (ex.: bytes JPEG do quadro) fica guardado em `best_anexo` enquanto a
+        detecção for a de maior confiança do grupo.
+        """
+        agora = agora if agora is not None else time.time()
+        confianca = float(rosto.get('confianca', 0.0))
+
+        with self._lock:
+            self.stats['deteccoes'] += 1
+            grupo = self._grupos.get(chave)
+
+            if grupo is not None and agora - grupo['last_seen'] <= self.janela:
+                grupo['last_seen'] = agora
+                grupo['count'] += 1
+                if confianca > grupo['best_confidence']:
+                    grupo['best_confidence'] = confianca
+                    grupo['best'] = {'timestamp': agora, **rosto}
+                    if anexo is not None:
+                        grupo['best_anexo'] = anexo
+                return grupo, False
+
+            if grupo is not None:
+                # Janela terminou antes da varredura: o grupo antigo ainda precisa ser fechado
+                self._deslocados.append(self._grupos.pop(chave))
+            elif len(self._grupos) >= self.max_grupos:
+                # Proteção de memória: encerra antecipadamente o grupo mais antigo
+                mais_antigo = min(self._grupos, key=lambda k: self._grupos[k]['last_seen'])
+                self._deslocados.append(self._grupos.pop(mais_antigo))
+
+            grupo = {
+                'chave': chave,
+                'first_seen': agora,
+                'last_seen': agora,
+                'count': 1,
+                'best_confidence': confianca,
+                'best': {'timestamp': agora, **rosto},
+                'best_anexo': anexo,
+                'alert': None
+            }
+            self._grupos[chave] = grupo
+            self.stats['grupos_abertos'] += 1
+            return grupo, True
+
+    def expirar(self, agora=None):
+        """
+        Remove e retorna os grupos cuja janela terminou, incluindo os que
+        foram substituídos ou despejados em `registrar` desde a última chamada.
+        """
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            fechados = self._deslocados
+            self._deslocados = []
+            expirados = [g for g in self._grupos.values() if agora - g['last_seen'] > self.janela]
+            for grupo in expirados:
+                del self._grupos[grupo['chave']]
+            fechados.extend(expirados)
+            self.stats['grupos_fechados'] += len(fechados)
+        return fechados
+
+    def abertos(self):
+        with self._lock:
+            return len(self._grupos)
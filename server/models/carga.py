@@ -0,0 +1,108 @@
+# servidor-central/models/carga.py
+"""
+Medição da carga de reconhecimento e dicas de taxa/qualidade para os clientes.
+
+A carga combina a fila (requisições em andamento em relação à capacidade) e
+a latência recente da rota (média móvel exponencial em relação ao alvo).
+Cada rota tem sua própria média, já que detectar rostos custa uma fração do
+reconhecimento completo, e a média decai com o tempo desde a última amostra
+(meia-vida `meia_vida` segundos): depois de um pico, clientes que foram
+desacelerados voltam ao ritmo normal mesmo enviando poucas requisições.
+Com a carga alta, os clientes recebem intervalos maiores e imagens menores,
+em vez de todos continuarem no ritmo fixo até estourarem o tempo limite.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# (carga máxima, multiplicador do intervalo, fator da escala, fator da qualidade JPEG);
+# os fatores multiplicam a escala/qualidade base da rota, que valem sem carga
+NIVEIS = [
+    (0.5, 0.6, 1.0, 1.0),
+    (1.0, 1.0, 1.0, 1.0),
+    (2.0, 2.0, 0.8, 0.9),
+    (float('inf'), 4.0, 0.6, 0.8),
+]
+
+
+class MonitorCarga:
+
+    def __init__(self, capacidade=2, latencia_alvo=0.3, suavizacao=0.2, intervalo_maximo=5000, meia_vida=5.0):
+        self.capacidade = capacidade
+        self.latencia_alvo = latencia_alvo
+        self.suavizacao = suavizacao
+        self.intervalo_maximo = intervalo_maximo
+        self.meia_vida = meia_vida
+        self.em_andamento = 0
+        self.latencias = {}   # nome -> (média em segundos, horário da última amostra)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def requisicao(self, rota):
+        """Conta a requisição como em andamento e mede sua latência total na `rota`."""
+        with self._lock:
+            self.em_andamento += 1
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(f'rota:{rota}', time.perf_counter() - inicio)
+            with self._lock:
+                self.em_andamento -= 1
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - inicio)
+
+    def _atual(self, nome, agora):
+        """Média de `nome` decaída pelo tempo sem amostras."""
+        media, horario = self.latencias.get(nome, (0.0, agora))
+        return media * 0.5 ** ((agora - horario) / self.meia_vida)
+
+    def registrar(self, nome, segundos):
+        agora = time.monotonic()
+        with self._lock:
+            if nome not in self.latencias:
+                self.latencias[nome] = (segundos, agora)
+            else:
+                anterior = self._atual(nome, agora)
+                self.latencias[nome] = (anterior + self.suavizacao * (segundos - anterior), agora)
+
+    def carga(self, rota):
+        agora = time.monotonic()
+        with self._lock:
+            fila = self.em_andamento / self.capacidade
+            latencia = self._atual(f'rota:{rota}', agora) / self.latencia_alvo
+        return max(fila, latencia)
+
+    def dicas(self, rota, intervalo_base, escala_base, qualidade_base):
+        """
+        Intervalo (ms), escala e qualidade recomendados para o próximo quadro
+        do cliente na `rota`. Sem carga valem os valores base da rota; a carga
+        só os reduz (ou aumenta o intervalo).
+        """
+        carga = self.carga(rota)
+        for limite, multiplicador, fator_escala, fator_qualidade in NIVEIS:
+            if carga <= limite:
+                break
+        # Acima do último nível, o intervalo cresce proporcionalmente à carga
+        if carga > NIVEIS[-2][0]:
+            multiplicador = max(multiplicador, carga * 2)
+        return {
+            'intervalo_ms': int(min(self.intervalo_maximo, intervalo_base * multiplicador)),
+            'escala': round(escala_base * fator_escala, 2),
+            'qualidade': round(qualidade_base * fator_qualidade, 2),
+            'carga': round(carga, 2)
+        }
+
+    def resumo(self):
+        agora = time.monotonic()
+        with self._lock:
+            return {
+                'em_andamento': self.em_andamento,
+                'latencias_ms': {nome: round(self._atual(nome, agora) * 1000, 1) for nome in self.latencias}
+            }
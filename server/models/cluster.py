@@ -0,0 +1,139 @@
+# servidor-central/models/cluster.py
+"""
+Modo multi-worker: divisão dos nós entre workers por hash consistente,
+registro de membros com batimentos no estado compartilhado e uma fila de
+mensagens local para broadcasts do Socket.IO entre servidores do mesmo processo.
+"""
+import bisect
+import hashlib
+import pickle
+import queue
+import threading
+import time
+
+from socketio import PubSubManager
+
+
+def _hash(chave):
+    return int.from_bytes(hashlib.md5(chave.encode('utf-8')).digest()[:8], 'big')
+
+
+class AnelHash:
+    """Anel de hash consistente com nós virtuais: mudar um membro move ~1/N das chaves."""
+
+    def __init__(self, membros=(), vnodes=64):
+        self.vnodes = vnodes
+        self._pontos = []
+        self._donos = []
+        pares = sorted(
+            (_hash(f'{membro}#{i}'), membro)
+            for membro in membros
+            for i in range(vnodes)
+        )
+        for ponto, membro in pares:
+            self._pontos.append(ponto)
+            self._donos.append(membro)
+
+    def dono(self, chave):
+        if not self._pontos:
+            return None
+        indice = bisect.bisect(self._pontos, _hash(chave)) % len(self._pontos)
+        return self._donos[indice]
+
+
+class Coordenador:
+    """
+    Mantém a lista de workers vivos no estado compartilhado e decide qual
+    worker é dono de cada nó. Um worker sem batimento há mais de `ttl`
+    segundos é considerado morto e seus nós são redistribuídos.
+    """
+
+    def __init__(self, estado, worker_id, url, ttl=15.0, vnodes=64):
+        self.estado = estado
+        self.worker_id = worker_id
+        self.url = url
+        self.ttl = ttl
+        self.vnodes = vnodes
+        self.membros = {}
+        self._anel = AnelHash([worker_id], vnodes)
+        self._meus_nodes = set()
+        self._lock = threading.Lock()
+
+    @property
+    def distribuido(self):
+        return len(self.membros) > 1
+
+    def batimento(self, agora=None):
+        """Publica o batimento deste worker e atualiza os membros. Retorna True se mudaram."""
+        agora = agora if agora is not None else time.time()
+        self.estado.hset('workers', self.worker_id, {'url': self.url, 'ts': agora})
+
+        vivos = {}
+        mortos = []
+        for worker_id, info in self.estado.hgetall('workers').items():
+            if agora - info.get('ts', 0) <= self.ttl:
+                vivos[worker_id] = info
+            else:
+                mortos.append(worker_id)
+        if mortos:
+            self.estado.hdel('workers', *mortos)
+
+        with self._lock:
+            mudou = set(vivos) != set(self.membros)
+            self.membros = vivos
+            if mudou:
+                self._anel = AnelHash(sorted(vivos), self.vnodes)
+        return mudou
+
+    def sair(self):
+        """Remove este worker do cluster (desligamento limpo)."""
+        self.estado.hdel('workers', self.worker_id)
+
+    def dono(self, node_id):
+        with self._lock:
+            return self._anel.dono(node_id)
+
+    def eh_dono(self, node_id):
+        return self.dono(node_id) == self.worker_id
+
+    def url_do_dono(self, node_id):
+        info = self.membros.get(self.dono(node_id), {})
+        return info.get('url')
+
+    def rebalancear(self, node_ids):
+        """Recalcula os nós deste worker. Retorna (assumidos, perdidos) desde a última chamada."""
+        meus = {node_id for node_id in node_ids if self.eh_dono(node_id)}
+        assumidos = meus - self._meus_nodes
+        perdidos = self._meus_nodes - meus
+        self._meus_nodes = meus
+        return assumidos, perdidos
+
+
+class FilaLocalManager(PubSubManager):
+    """
+    Fila de mensagens em processo para o Socket.IO, com o mesmo caminho de
+    publicação/assinatura dos backends Redis/Kombu. Útil para testar vários
+    servidores no mesmo processo sem infraestrutura externa.
+    """
+    name = 'local'
+
+    _assinantes = {}
+    _lock_assinantes = threading.Lock()
+
+    def __init__(self, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self._fila = queue.Queue()
+        if not write_only:
+            with self._lock_assinantes:
+                self._assinantes.setdefault(channel, []).append(self._fila)
+
+    def _publish(self, data):
+        mensagem = pickle.dumps(data)
+        with self._lock_assinantes:
+            filas = list(self._assinantes.get(self.channel, []))
+        for fila in filas:
+            fila.put(mensagem)
+
+    def _listen(self):
+        while True:
+            yield self._fila.get()
@@ -0,0 +1,99 @@
+# servidor-central/models/database.py
+"""
+Estado compartilhado entre workers do servidor.
+
+O armazenamento expõe apenas operações de hash (hset/hget/hgetall/hdel, mais
+hsetnx e o contador atômico hincr) com valores JSON, o suficiente para nós, alertas,
+membros do cluster e metadados. A
+implementação em memória serve ao modo de processo único e aos testes; a
+implementação Redis permite vários processos/hosts.
+"""
+import copy
+import json
+import threading
+
+
+class EstadoMemoria:
+    """Armazenamento em memória do próprio processo (padrão, sem dependências)."""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def hset(self, nome, campo, valor):
+        with self._lock:
+            self._hashes.setdefault(nome, {})[campo] = copy.deepcopy(valor)
+
+    def hget(self, nome, campo, default=None):
+        with self._lock:
+            valor = self._hashes.get(nome, {}).get(campo, default)
+            return copy.deepcopy(valor)
+
+    def hgetall(self, nome):
+        with self._lock:
+            return copy.deepcopy(self._hashes.get(nome, {}))
+
+    def hdel(self, nome, *campos):
+        with self._lock:
+            dados = self._hashes.get(nome, {})
+            for campo in campos:
+                dados.pop(campo, None)
+
+    def hsetnx(self, nome, campo, valor):
+        """Grava apenas se o campo não existe. Retorna True se gravou."""
+        with self._lock:
+            dados = self._hashes.setdefault(nome, {})
+            if campo in dados:
+                return False
+            dados[campo] = copy.deepcopy(valor)
+            return True
+
+    def hincr(self, nome, campo, n=1):
+        with self._lock:
+            dados = self._hashes.setdefault(nome, {})
+            dados[campo] = dados.get(campo, 0) + n
+            return dados[campo]
+
+
+class EstadoRedis:
+    """Armazenamento em Redis, compartilhado por todos os workers."""
+
+    def __init__(self, url, prefixo='mike:'):
+        import redis  # dependência opcional, só necessária no modo distribuído
+        self._redis = redis.Redis.from_url(url)
+        self._prefixo = prefixo
+
+    def _chave(self, nome):
+        return self._prefixo + nome
+
+    def hset(self, nome, campo, valor):
+        self._redis.hset(self._chave(nome), campo, json.dumps(valor))
+
+    def hget(self, nome, campo, default=None):
+        valor = self._redis.hget(self._chave(nome), campo)
+        return json.loads(valor) if valor is not None else default
+
+    def hgetall(self, nome):
+        return {
+            campo.decode('utf-8'): json.loads(valor)
+            for campo, valor in self._redis.hgetall(self._chave(nome)).items()
+        }
+
+    def hdel(self, nome, *campos):
+        if campos:
+            self._redis.hdel(self._chave(nome), *campos)
+
+    def hsetnx(self, nome, campo, valor):
+        return bool(self._redis.hsetnx(self._chave(nome), campo, json.dumps(valor)))
+
+    def hincr(self, nome, campo, n=1):
+        return self._redis.hincrby(self._chave(nome), campo, n)
+
+
+def criar_estado(url=None):
+    """Cria o armazenamento a partir de uma URL ('memoria://' ou 'redis://...')."""
+    if not url or url.startswith('memoria://'):
+        return EstadoMemoria()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return EstadoRedis(url)
+    raise ValueError(f'Backend de estado não suportado: {url}')
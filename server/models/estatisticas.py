@@ -0,0 +1,244 @@
+# servidor-central/models/estatisticas.py
+"""
+Séries temporais de detecções pré-agregadas.
+
+Cada detecção incrementa contadores por minuto e por hora em buffers
+circulares de tamanho fixo, para o total geral, para o nó e para a
+identidade. Consultar N intervalos custa O(N), sem varrer o histórico de
+alertas nem tocar na galeria.
+
+`EstatisticasDeteccoes` guarda os contadores no processo e em data/stats.json
+(worker único); `EstatisticasCompartilhadas` os guarda no estado compartilhado,
+para que todos os workers somem e consultem as mesmas séries.
+"""
+import json
+import os
+import threading
+import time
+from array import array
+
+GRANULARIDADES = {
+    'minuto': (60, 24 * 60),     # largura (s), intervalos guardados: 24h
+    'hora': (3600, 24 * 7),      # 7 dias
+}
+
+
+class SerieCircular:
+    """Contadores em um anel de `tamanho` intervalos de `largura` segundos."""
+
+    def __init__(self, largura, tamanho):
+        self.largura = largura
+        self.tamanho = tamanho
+        self.contagens = array('I', [0]) * tamanho
+        self.intervalos = array('q', [-1]) * tamanho  # número absoluto do intervalo em cada posição
+
+    def incrementar(self, agora, n=1):
+        intervalo = int(agora // self.largura)
+        pos = intervalo % self.tamanho
+        if self.intervalos[pos] != intervalo:
+            self.intervalos[pos] = intervalo
+            self.contagens[pos] = 0
+        self.contagens[pos] += n
+
+    def serie(self, agora, quantidade):
+        """[[início do intervalo (epoch), contagem], ...] dos últimos `quantidade` intervalos."""
+        quantidade = min(quantidade, self.tamanho)
+        atual = int(agora // self.largura)
+        pontos = []
+        for intervalo in range(atual - quantidade + 1, atual + 1):
+            pos = intervalo % self.tamanho
+            contagem = self.contagens[pos] if self.intervalos[pos] == intervalo else 0
+            pontos.append([intervalo * self.largura, contagem])
+        return pontos
+
+    def exportar(self):
+        return [[self.intervalos[i], self.contagens[i]] for i in range(self.tamanho) if self.contagens[i]]
+
+    def importar(self, pares):
+        for intervalo, contagem in pares:
+            pos = intervalo % self.tamanho
+            self.intervalos[pos] = intervalo
+            self.contagens[pos] = contagem
+
+
+class EstatisticasDeteccoes:
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self._lock = threading.Lock()
+        self._series = {}    # (dimensao, chave) -> {granularidade: SerieCircular}
+        self.totais = {'geral': 0, 'nodes': {}, 'identidades': {}}
+        self._alterado = False
+
+    def _series_de(self, dimensao, chave):
+        series = self._series.get((dimensao, chave))
+        if series is None:
+            series = {nome: SerieCircular(largura, tamanho) for nome, (largura, tamanho) in GRANULARIDADES.items()}
+            self._series[(dimensao, chave)] = series
+        return series
+
+    def registrar(self, node_id, nome, n=1, agora=None):
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            for dimensao, chave in (('geral', ''), ('node', node_id), ('identidade', nome)):
+                for serie in self._series_de(dimensao, chave).values():
+                    serie.incrementar(agora, n)
+            self.totais['geral'] += n
+            self.totais['nodes'][node_id] = self.totais['nodes'].get(node_id, 0) + n
+            self.totais['identidades'][nome] = self.totais['identidades'].get(nome, 0) + n
+            self._alterado = True
+
+    def totais_atuais(self):
+        """Cópia dos totais tirada sob o lock, segura para serializar fora dele."""
+        with self._lock:
+            return self._copiar_totais()
+
+    def total_geral(self):
+        with self._lock:
+            return self.totais['geral']
+
+    def _copiar_totais(self):
+        return {
+            'geral': self.totais['geral'],
+            'nodes': dict(self.totais['nodes']),
+            'identidades': dict(self.totais['identidades'])
+        }
+
+    def serie(self, granularidade='minuto', quantidade=60, node_id=None, nome=None, agora=None):
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f'Granularidade inválida: {granularidade}')
+        if node_id is not None:
+            dimensao, chave = 'node', node_id
+        elif nome is not None:
+            dimensao, chave = 'identidade', nome
+        else:
+            dimensao, chave = 'geral', ''
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            series = self._series.get((dimensao, chave))
+            if series is None:
+                largura, tamanho = GRANULARIDADES[granularidade]
+                series = {granularidade: SerieCircular(largura, tamanho)}
+            return series[granularidade].serie(agora, quantidade)
+
+    # =================== PERSISTÊNCIA ===================
+
+    def salvar(self):
+        """Grava os contadores não nulos, apenas se houve detecções desde a última gravação."""
+        with self._lock:
+            if not self._alterado:
+                return False
+            dados = {
+                'totais': self._copiar_totais(),
+                'series': [
+                    {'dimensao': dimensao, 'chave': chave,
+                     **{nome: serie.exportar() for nome, serie in series.items()}}
+                    for (dimensao, chave), series in self._series.items()
+                ]
+            }
+            self._alterado = False
+        temporario = self.arquivo + '.tmp'
+        with open(temporario, 'w') as f:
+            json.dump(dados, f)
+        os.replace(temporario, self.arquivo)
+        return True
+
+    def carregar(self):
+        try:
+            if not os.path.exists(self.arquivo):
+                return
+            with open(self.arquivo) as f:
+                dados = json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar estatísticas: {e}")
+            return
+        with self._lock:
+            self.totais.update(dados.get('totais', {}))
+            for item in dados.get('series', []):
+                series = self._series_de(item['dimensao'], item['chave'])
+                for nome, serie in series.items():
+                    serie.importar(item.get(nome, []))
+
+
+class EstatisticasCompartilhadas:
+    """
+    Mesma interface de `EstatisticasDeteccoes`, com os contadores no estado
+    compartilhado entre workers: cada série é um hash `serie:<dimensão>:<chave>:<granularidade>`
+    com um campo por intervalo. As detecções são somadas localmente e enviadas
+    em lote por `salvar()` (hincr), então cada worker faz poucas escritas por
+    ciclo e qualquer worker responde com as contagens de todos.
+    """
+
+    def __init__(self, estado):
+        self.estado = estado
+        self._lock = threading.Lock()
+        self._pendentes = {}  # (hash, campo) -> incremento ainda não enviado
+        self._aparados = {}   # hash -> último intervalo em que os campos antigos foram removidos
+
+    @staticmethod
+    def _hash_serie(dimensao, chave, granularidade):
+        return f'serie:{dimensao}:{chave}:{granularidade}'
+
+    def registrar(self, node_id, nome, n=1, agora=None):
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            for dimensao, chave in (('geral', ''), ('node', node_id), ('identidade', nome)):
+                for granularidade, (largura, _) in GRANULARIDADES.items():
+                    campo = (self._hash_serie(dimensao, chave, granularidade), str(int(agora // largura)))
+                    self._pendentes[campo] = self._pendentes.get(campo, 0) + n
+            for campo in ('geral', f'node:{node_id}', f'identidade:{nome}'):
+                chave = ('estatisticas_totais', campo)
+                self._pendentes[chave] = self._pendentes.get(chave, 0) + n
+
+    def salvar(self, agora=None):
+        """Envia os incrementos acumulados e remove intervalos que saíram da janela. Retorna se enviou."""
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            pendentes, self._pendentes = self._pendentes, {}
+        for (nome_hash, campo), n in pendentes.items():
+            self.estado.hincr(nome_hash, campo, n)
+
+        for nome_hash in {nome_hash for nome_hash, _ in pendentes if nome_hash.startswith('serie:')}:
+            largura, tamanho = GRANULARIDADES[nome_hash.rsplit(':', 1)[1]]
+            atual = int(agora // largura)
+            if self._aparados.get(nome_hash) == atual:
+                continue
+            self._aparados[nome_hash] = atual
+            antigos = [campo for campo in self.estado.hgetall(nome_hash) if int(campo) <= atual - tamanho]
+            if antigos:
+                self.estado.hdel(nome_hash, *antigos)
+        return bool(pendentes)
+
+    def carregar(self):
+        """Nada a carregar: os contadores vivem no estado compartilhado."""
+
+    def serie(self, granularidade='minuto', quantidade=60, node_id=None, nome=None, agora=None):
+        if granularidade not in GRANULARIDADES:
+            raise ValueError(f'Granularidade inválida: {granularidade}')
+        if node_id is not None:
+            dimensao, chave = 'node', node_id
+        elif nome is not None:
+            dimensao, chave = 'identidade', nome
+        else:
+            dimensao, chave = 'geral', ''
+        agora = agora if agora is not None else time.time()
+        largura, tamanho = GRANULARIDADES[granularidade]
+        contagens = self.estado.hgetall(self._hash_serie(dimensao, chave, granularidade))
+        atual = int(agora // largura)
+        return [[intervalo * largura, int(contagens.get(str(intervalo), 0))]
+                for intervalo in range(atual - min(quantidade, tamanho) + 1, atual + 1)]
+
+    def totais_atuais(self):
+        totais = {'geral': 0, 'nodes': {}, 'identidades': {}}
+        for campo, n in self.estado.hgetall('estatisticas_totais').items():
+            tipo, _, chave = campo.partition(':')
+            if tipo == 'geral':
+                totais['geral'] = int(n)
+            elif tipo == 'node':
+                totais['nodes'][chave] = int(n)
+            elif tipo == 'identidade':
+                totais['identidades'][chave] = int(n)
+        return totais
+
+    def total_geral(self):
+        return int(self.estado.hget('estatisticas_totais', 'geral', 0))
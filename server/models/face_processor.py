@@ -0,0 +1,121 @@
+# servidor-central/models/face_processor.py
+"""
+Motor de reconhecimento com carregamento preguiçoso.
+
+numpy, PIL e face_recognition (com os modelos do dlib) só são importados no
+primeiro uso ou no aquecimento em segundo plano. Processos que servem apenas
+o dashboard e as APIs dos nós sobem sem pagar esse custo.
+"""
+import threading
+import time
+
+
+class MotorReconhecimento:
+
+    def __init__(self, aquecimento=True):
+        self.aquecimento = aquecimento  # False: sem aquecimento, a pilha carrega no primeiro uso
+        self._lock = threading.Lock()
+        self._np = None
+        self._image = None
+        self._fr = None
+        self.pronto = False
+        self.estado = 'frio'
+        self.erro = None
+        self.tempos = {}
+
+    # =================== CARREGAMENTO ===================
+
+    def carregar(self):
+        """Importa a pilha de reconhecimento (idempotente e seguro entre threads)."""
+        if self._fr is not None:
+            return
+        with self._lock:
+            if self._fr is not None:
+                return
+            inicio = time.perf_counter()
+            import numpy
+            from PIL import Image
+            import face_recognition
+            self._np = numpy
+            self._image = Image
+            self._fr = face_recognition
+            self.tempos['modelos_s'] = round(time.perf_counter() - inicio, 3)
+            if not self.aquecimento:
+                # Sem aquecimento não há outro caminho que marque a pilha como pronta
+                self.pronto = True
+                self.estado = 'pronto'
+
+    def aquecer(self, galeria=None):
+        """Carrega modelos e galeria e roda uma inferência de teste."""
+        self.estado = 'aquecendo'
+        try:
+            self.carregar()
+
+            if galeria is not None:
+                inicio = time.perf_counter()
+                galeria.como_dicionario()
+                self.tempos['galeria_s'] = round(time.perf_counter() - inicio, 3)
+
+            # Inferência fictícia: inicializa detector HOG e rede de encodings do dlib
+            inicio = time.perf_counter()
+            quadro = self._np.zeros((160, 160, 3), dtype=self._np.uint8)
+            self._fr.face_locations(quadro, model='hog', number_of_times_to_upsample=0)
+            self._fr.face_encodings(quadro, [(20, 140, 140, 20)])
+            self.tempos['inferencia_s'] = round(time.perf_counter() - inicio, 3)
+
+            self.pronto = True
+            self.estado = 'pronto'
+            print(f"🔥 Reconhecimento aquecido: {self.tempos}")
+        except Exception as e:
+            self.erro = str(e)
+            self.estado = 'erro'
+            print(f"❌ Erro no aquecimento do reconhecimento: {e}")
+
+    def iniciar_aquecimento(self, galeria=None):
+        threading.Thread(target=self.aquecer, args=(galeria,), daemon=True).start()
+
+    def status(self):
+        return {
+            'pronto': self.pronto,
+            'estado': self.estado,
+            'modo': 'aquecimento' if self.aquecimento else 'sob_demanda',
+            'erro': self.erro,
+            'tempos': self.tempos
+        }
+
+    # =================== OPERAÇÕES ===================
+
+    def processar_imagem(self, image_data):
+        """Converte bytes de imagem em array numpy RGB, reduzindo imagens grandes."""
+        self.carregar()
+        from io import BytesIO
+
+        image = self._image.open(BytesIO(image_data))
+
+        # CORREÇÃO 1: Redimensionar imagem se muito grande
+        width, height = image.size
+        if width > 800 or height > 600:
+            # Manter proporção mas reduzir tamanho
+            ratio = min(800/width, 600/height)
+            new_size = (int(width * ratio), int(height * ratio))
+            image = image.resize(new_size, self._image.Resampling.LANCZOS)
+            print(f"Imagem redimensionada de {width}x{height} para {new_size[0]}x{new_size[1]}")
+
+        # CORREÇÃO 2: Converter para RGB se necessário
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        return self._np.array(image)
+
+    def localizar_rostos(self, rgb_frame, model='hog', number_of_times_to_upsample=0):
+        self.carregar()
+        return self._fr.face_locations(rgb_frame, model=model,
+                                       number_of_times_to_upsample=number_of_times_to_upsample)
+
+    def gerar_encodings(self, rgb_frame, face_locations):
+        self.carregar()
+        return self._fr.face_encodings(rgb_frame, face_locations)
+
+    def comparar_rostos(self, known_encodings, face_encoding, tolerance=0.6):
+        self.carregar()
+        return self._fr.compare_faces(known_encodings, face_encoding, tolerance=tolerance)
@@ -0,0 +1,362 @@
+# servidor-central/models/galeria.py
+"""
+Galeria de rostos versionada.
+
+Cada cadastro, atualização ou remoção incrementa a versão da galeria. As
+mudanças são anexadas a um log em disco e, a cada `intervalo_snapshot`
+mudanças, a galeria inteira é regravada como snapshot (no mesmo formato
+{"nomes", "encodings"} de antes, mais a versão) e o log é truncado.
+
+Leitores do arquivo antigo continuam vendo a galeria atual: o `arquivo_legado`
+({"nomes", "encodings"}) é regravado a cada mudança, e é de onde a galeria
+parte quando ainda não existe snapshot próprio.
+
+Consumidores com uma cópia local pedem `mudancas_desde(versao)` e recebem
+apenas o que mudou; se a versão pedida é mais antiga que o histórico em
+memória, recebem o snapshot completo.
+
+O arquivo só é lido no primeiro acesso (ou em `carregar()`), para que a
+inicialização do servidor não dependa de desserializar a galeria.
+
+Com vários workers, o log de verdade fica no estado compartilhado: cada
+mudança ocupa a próxima versão livre em `galeria_log` (quem grava primeiro
+vence; o outro sincroniza, revalida e tenta a versão seguinte) e os workers
+aplicam as versões publicadas pelos demais em `sincronizar()`. Os arquivos
+locais passam a ser apenas um cache de inicialização.
+"""
+import base64
+import bisect
+import os
+import pickle
+import threading
+
+from shared.utils import empacotar_encoding, desempacotar_encoding
+
+
+class GaleriaVersionada:
+
+    def __init__(self, arquivo_snapshot, arquivo_log, arquivo_legado=None, estado=None,
+                 intervalo_snapshot=200, limite_historico=10000):
+        self.arquivo_snapshot = arquivo_snapshot
+        self.arquivo_log = arquivo_log
+        self.arquivo_legado = arquivo_legado
+        self.estado = estado        # estado compartilhado entre workers (None: processo único)
+        self.intervalo_snapshot = intervalo_snapshot
+        self.limite_historico = limite_historico
+
+        self._lock = threading.RLock()
+        self._itens = {}            # nome -> {'encoding', 'versao'}
+        self._historico = []        # [(versao, acao, nome)] em ordem crescente
+        self._versoes_historico = []
+        self._versao = 0
+        self._versao_base = 0       # mudanças após esta versão estão no histórico
+        self._mudancas_no_log = 0
+        self._cache = None
+        self.carregada = False
+
+    @property
+    def versao(self):
+        self.carregar()
+        return self._versao
+
+    # =================== PERSISTÊNCIA ===================
+
+    def carregar(self):
+        """Lê snapshot e log do disco, uma única vez."""
+        if self.carregada:
+            return
+        with self._lock:
+            if not self.carregada:
+                self._carregar()
+                self.carregada = True
+                if self.estado is not None:
+                    self._semear_estado()
+
+    def _carregar(self):
+        dados = {}
+        origem = self.arquivo_snapshot
+        if not os.path.exists(origem) and self.arquivo_legado:
+            origem = self.arquivo_legado
+        try:
+            if os.path.exists(origem) and os.path.getsize(origem) > 0:
+                with open(origem, 'rb') as f:
+                    dados = pickle.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar galeria: {e}")
+
+        nomes = dados.get('nomes', [])
+        encodings = dados.get('encodings', [])
+        versoes = dados.get('versoes') or list(range(1, len(nomes) + 1))
+        for nome, encoding, versao in zip(nomes, encodings, versoes):
+            self._itens[nome] = {'encoding': encoding, 'versao': versao}
+        self._versao = dados.get('versao', len(nomes))
+        self._versao_base = self._versao
+
+        if origem != self.arquivo_snapshot:
+            # Primeira carga a partir do arquivo antigo, que já contém todas as
+            # mudanças: vira o snapshot versionado e um log órfão é descartado
+            if dados:
+                self._compactar()
+            return
+
+        # Reaplicar mudanças feitas após o último snapshot
+        try:
+            if os.path.exists(self.arquivo_log):
+                with open(self.arquivo_log, 'rb') as f:
+                    while True:
+                        try:
+                            versao, acao, nome, encoding = pickle.load(f)
+                        except EOFError:
+                            break
+                        if versao > self._versao:
+                            self._aplicar(versao, acao, nome, encoding)
+                            self._mudancas_no_log += 1
+        except Exception as e:
+            print(f"Erro ao reaplicar log da galeria (registro parcial ignorado): {e}")
+
+    def _anexar_log(self, registro):
+        with open(self.arquivo_log, 'ab') as f:
+            pickle.dump(registro, f)
+        self._mudancas_no_log += 1
+        if self._mudancas_no_log >= self.intervalo_snapshot:
+            self.compactar()
+
+    def _exportar_legado(self):
+        """Regrava o arquivo {"nomes", "encodings"} lido por consumidores antigos."""
+        if not self.arquivo_legado:
+            return
+        temporario = f'{self.arquivo_legado}.{os.getpid()}.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(self.como_dicionario(), f)
+        os.replace(temporario, self.arquivo_legado)
+
+    def compactar(self):
+        """Grava o snapshot completo da versão atual e trunca o log de mudanças."""
+        self.carregar()
+        with self._lock:
+            self._compactar()
+
+    def _compactar(self):
+        nomes = list(self._itens)
+        dados = {
+            'nomes': nomes,
+            'encodings': [self._itens[n]['encoding'] for n in nomes],
+            'versoes': [self._itens[n]['versao'] for n in nomes],
+            'versao': self._versao
+        }
+        temporario = self.arquivo_snapshot + '.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(dados, f)
+        os.replace(temporario, self.arquivo_snapshot)
+        open(self.arquivo_log, 'wb').close()
+        self._mudancas_no_log = 0
+        if self.estado is not None:
+            self._publicar_snapshot()
+
+    # =================== MUDANÇAS ===================
+
+    def _aplicar(self, versao, acao, nome, encoding):
+        if acao == 'removed':
+            self._itens.pop(nome, None)
+        else:
+            self._itens[nome] = {'encoding': encoding, 'versao': versao}
+        self._versao = versao
+        self._historico.append((versao, acao, nome))
+        self._versoes_historico.append(versao)
+        if len(self._historico) > self.limite_historico:
+            excesso = len(self._historico) - self.limite_historico
+            self._versao_base = self._historico[excesso - 1][0]
+            del self._historico[:excesso]
+            del self._versoes_historico[:excesso]
+        self._cache = None
+
+    def _registrar(self, acao, validar, encoding=None):
+        """
+        Valida e grava a mudança na próxima versão. `validar()` devolve o nome
+        a gravar (ou levanta erro) e é repetida se outro worker publicou a
+        mesma versão antes, pois a galeria pode ter mudado nesse meio tempo.
+        """
+        self.carregar()
+        with self._lock:
+            while True:
+                self.sincronizar()
+                registro = (self._versao + 1, acao, validar(), encoding)
+                if self.estado is None or self.estado.hsetnx('galeria_log', str(registro[0]), _para_estado(registro)):
+                    break
+            self._aplicar(*registro)
+            self._anexar_log(registro)
+            self._exportar_legado()
+            return registro[0]
+
+    def adicionar(self, nome, encoding):
+        def validar():
+            if self.obter_nome(nome):
+                raise ValueError(f'Já existe pessoa com nome "{nome}"')
+            return nome
+        return self._registrar('added', validar, encoding)
+
+    def _validar_existente(self, nome):
+        nome_existente = self.obter_nome(nome)
+        if not nome_existente:
+            raise KeyError(nome)
+        return nome_existente
+
+    def atualizar(self, nome, encoding):
+        return self._registrar('updated', lambda: self._validar_existente(nome), encoding)
+
+    def remover(self, nome):
+        return self._registrar('removed', lambda: self._validar_existente(nome))
+
+    # =================== SINCRONIZAÇÃO ENTRE WORKERS ===================
+
+    def sincronizar(self):
+        """Aplica as versões publicadas por outros workers no log compartilhado. Retorna quantas."""
+        if self.estado is None:
+            return 0
+        self.carregar()
+        aplicadas = 0
+        with self._lock:
+            while True:
+                dados = self.estado.hget('galeria_log', str(self._versao + 1))
+                if dados is not None:
+                    registro = _de_estado(dados)
+                    self._aplicar(*registro)
+                    self._anexar_log(registro)
+                    aplicadas += 1
+                    continue
+                # Versões que faltam podem ter sido compactadas no snapshot compartilhado
+                if (self.estado.hget('galeria', 'snapshot_versao', 0) > self._versao
+                        and self._carregar_snapshot_compartilhado()):
+                    aplicadas += 1
+                    continue
+                if aplicadas:
+                    self._exportar_legado()
+                return aplicadas
+
+    def _publicar_snapshot(self):
+        """Grava a galeria no estado compartilhado e descarta as entradas antigas do log."""
+        if self.estado.hget('galeria', 'snapshot_versao', 0) >= self._versao:
+            return
+        self.estado.hset('galeria', 'snapshot', {
+            'versao': self._versao,
+            'itens': [[nome, item['versao'], _encoding_para_texto(item['encoding'])]
+                      for nome, item in self._itens.items()]
+        })
+        self.estado.hset('galeria', 'snapshot_versao', self._versao)
+        # Folga de um intervalo para workers que ainda estejam lendo as versões anteriores
+        antigas = [versao for versao in map(int, self.estado.hgetall('galeria_log'))
+                   if versao <= self._versao - self.intervalo_snapshot]
+        if antigas:
+            self.estado.hdel('galeria_log', *map(str, antigas))
+
+    def _carregar_snapshot_compartilhado(self):
+        dados = self.estado.hget('galeria', 'snapshot')
+        if not dados or dados['versao'] <= self._versao:
+            return False
+        self._itens = {
+            nome: {'encoding': _encoding_de_texto(encoding), 'versao': versao}
+            for nome, versao, encoding in dados['itens']
+        }
+        self._versao = self._versao_base = dados['versao']
+        self._historico = []
+        self._versoes_historico = []
+        self._cache = None
+        self.compactar()
+        return True
+
+    def _semear_estado(self):
+        """Publica a galeria local quando o estado compartilhado ainda não a conhece (ex.: Redis novo)."""
+        if self._versao and self.estado.hget('galeria_log', str(self._versao)) is None:
+            self._publicar_snapshot()
+
+    # =================== CONSULTAS ===================
+
+    def obter_nome(self, nome):
+        """Nome cadastrado equivalente (sem diferenciar maiúsculas), ou None."""
+        alvo = nome.lower()
+        self.carregar()
+        with self._lock:
+            for existente in self._itens:
+                if existente.lower() == alvo:
+                    return existente
+        return None
+
+    def __len__(self):
+        self.carregar()
+        return len(self._itens)
+
+    def como_dicionario(self):
+        """Formato legado {"nomes", "encodings"}, em cache até a próxima mudança."""
+        self.carregar()
+        with self._lock:
+            if self._cache is None:
+                nomes = list(self._itens)
+                self._cache = {
+                    'nomes': nomes,
+                    'encodings': [self._itens[n]['encoding'] for n in nomes]
+                }
+            return self._cache
+
+    def snapshot(self):
+        self.carregar()
+        with self._lock:
+            return {
+                'versao': self._versao,
+                'completo': True,
+                'adicionados': [
+                    {'nome': nome, 'versao': item['versao'], 'encoding': item['encoding']}
+                    for nome, item in self._itens.items()
+                ],
+                'atualizados': [],
+                'removidos': []
+            }
+
+    def mudancas_desde(self, versao):
+        """
+        Mudanças líquidas após `versao`. Cada nome aparece no máximo uma vez:
+        adicionado (não existia em `versao`), atualizado ou removido.
+        """
+        self.carregar()
+        with self._lock:
+            if versao < self._versao_base or versao > self._versao:
+                return self.snapshot()
+
+            inicio = bisect.bisect_right(self._versoes_historico, versao)
+            primeira_acao = {}
+            for _, acao, nome in self._historico[inicio:]:
+                primeira_acao.setdefault(nome, acao)
+
+            resultado = {'versao': self._versao, 'completo': False,
+                         'adicionados': [], 'atualizados': [], 'removidos': []}
+            for nome, acao in primeira_acao.items():
+                existia = acao != 'added'
+                item = self._itens.get(nome)
+                if item is None:
+                    # Criado e removido dentro do intervalo: nada a transmitir
+                    if existia:
+                        resultado['removidos'].append({'nome': nome})
+                    continue
+                entrada = {'nome': nome, 'versao': item['versao'], 'encoding': item['encoding']}
+                resultado['atualizados' if existia else 'adicionados'].append(entrada)
+            return resultado
+
+
+# =================== SERIALIZAÇÃO NO ESTADO ===================
+
+def _encoding_para_texto(encoding):
+    return base64.b64encode(empacotar_encoding(encoding, float16=False)).decode('ascii')
+
+
+def _encoding_de_texto(texto):
+    return desempacotar_encoding(base64.b64decode(texto), float16=False)
+
+
+def _para_estado(registro):
+    versao, acao, nome, encoding = registro
+    return {'versao': versao, 'acao': acao, 'nome': nome,
+            'encoding': _encoding_para_texto(encoding) if encoding is not None else None}
+
+
+def _de_estado(dados):
+    encoding = _encoding_de_texto(dados['encoding']) if dados.get('encoding') else None
+    return (dados['versao'], dados['acao'], dados['nome'], encoding)
@@ -0,0 +1,211 @@
+# servidor-central/models/snapshots.py
+"""
+Armazém de snapshots de detecções.
+
+Os bytes JPEG recebidos são gravados como estão (sem decodificar nem
+recodificar) em segmentos append-only `seg_<n>.bin`. Cada segmento tem um
+índice `seg_<n>.idx` com uma linha JSON por snapshot (alerta, nó, horário,
+offset, tamanho). A leitura é um seek + read no intervalo indicado pelo índice,
+e a retenção apaga segmentos inteiros por idade ou tamanho total.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+
+
+class ArmazemSnapshots:
+
+    def __init__(self, diretorio, tamanho_segmento=16 * 1024 * 1024, duracao_segmento=3600,
+                 max_idade=7 * 24 * 3600, max_bytes=512 * 1024 * 1024):
+        self.diretorio = diretorio
+        self.tamanho_segmento = tamanho_segmento
+        self.duracao_segmento = duracao_segmento
+        self.max_idade = max_idade
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._segmentos = {}   # n -> {'tamanho', 'inicio', 'fim'}
+        self._por_alerta = {}  # alert_id -> entrada mais recente
+        self._por_no = {}      # node_id -> [entradas] em ordem de horário
+        self._ativo = None
+        self._arquivo = None
+        self._indice = None
+        self._ultimo = (None, None)  # (bytes, entrada) da última gravação, para reaproveitar o blob
+
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_indices()
+
+    # =================== ÍNDICE ===================
+
+    def _caminho(self, n, extensao):
+        return os.path.join(self.diretorio, f'seg_{n:06d}.{extensao}')
+
+    def _indexar(self, entrada):
+        self._por_alerta[entrada['a']] = entrada
+        # Em ordem de horário: a melhor captura de um alerta pode chegar depois de capturas mais novas
+        bisect.insort(self._por_no.setdefault(entrada['n'], []), entrada, key=lambda e: e['t'])
+        segmento = self._segmentos[entrada['s']]
+        segmento['inicio'] = min(segmento['inicio'], entrada['t'])
+        segmento['fim'] = max(segmento['fim'], entrada['t'])
+
+    def _carregar_indices(self):
+        numeros = sorted(
+            int(nome[4:10]) for nome in os.listdir(self.diretorio)
+            if nome.startswith('seg_') and nome.endswith('.bin')
+        )
+        for n in numeros:
+            tamanho_dados = os.path.getsize(self._caminho(n, 'bin'))
+            self._segmentos[n] = {'tamanho': tamanho_dados, 'inicio': float('inf'), 'fim': 0.0}
+            try:
+                with open(self._caminho(n, 'idx')) as f:
+                    for linha in f:
+                        try:
+                            entrada = json.loads(linha)
+                        except ValueError:
+                            continue  # linha parcial de uma gravação interrompida
+                        if entrada['o'] + entrada['l'] <= tamanho_dados:
+                            entrada['s'] = n
+                            self._indexar(entrada)
+            except FileNotFoundError:
+                pass
+
+    # =================== ESCRITA ===================
+
+    def _abrir_segmento(self, agora):
+        self._fechar_segmento()
+        n = max(self._segmentos, default=0) + 1
+        self._segmentos[n] = {'tamanho': 0, 'inicio': agora, 'fim': agora}
+        self._ativo = n
+        self._arquivo = open(self._caminho(n, 'bin'), 'ab')
+        self._indice = open(self._caminho(n, 'idx'), 'a')
+
+    def _fechar_segmento(self):
+        for arquivo in (self._arquivo, self._indice):
+            if arquivo:
+                arquivo.close()
+        self._ativo = self._arquivo = self._indice = None
+        self._ultimo = (None, None)
+
+    def guardar(self, alert_id, node_id, jpeg, timestamp=None):
+        """
+        Anexa os bytes JPEG ao segmento ativo e indexa por alerta, nó e horário.
+        Se `jpeg` é o mesmo objeto da gravação anterior (um quadro com vários
+        rostos abrindo vários alertas), o alerta aponta para o blob já gravado.
+        """
+        if not jpeg:
+            return None
+        agora = timestamp if timestamp is not None else time.time()
+        with self._lock:
+            anterior_jpeg, anterior = self._ultimo
+            if jpeg is anterior_jpeg and anterior['s'] == self._ativo:
+                entrada = {'a': alert_id, 'n': node_id, 't': agora, 'o': anterior['o'], 'l': anterior['l']}
+                self._indice.write(json.dumps(entrada) + '\n')
+                self._indice.flush()
+                entrada['s'] = self._ativo
+                self._indexar(entrada)
+                return entrada
+
+            segmento = self._segmentos.get(self._ativo)
+            if (segmento is None
+                    or segmento['tamanho'] + len(jpeg) > self.tamanho_segmento
+                    or agora - segmento['inicio'] > self.duracao_segmento):
+                self._abrir_segmento(agora)
+                segmento = self._segmentos[self._ativo]
+
+            offset = segmento['tamanho']
+            self._arquivo.write(jpeg)
+            self._arquivo.flush()
+            segmento['tamanho'] += len(jpeg)
+
+            entrada = {'a': alert_id, 'n': node_id, 't': agora, 'o': offset, 'l': len(jpeg)}
+            self._indice.write(json.dumps(entrada) + '\n')
+            self._indice.flush()
+
+            entrada['s'] = self._ativo
+            self._indexar(entrada)
+            self._ultimo = (jpeg, entrada)
+            return entrada
+
+    # =================== LEITURA ===================
+
+    def ler(self, alert_id):
+        """Bytes JPEG do snapshot de um alerta (leitura do intervalo no segmento), ou None."""
+        with self._lock:
+            entrada = self._por_alerta.get(alert_id)
+        if entrada is None:
+            return None
+        try:
+            with open(self._caminho(entrada['s'], 'bin'), 'rb') as f:
+                f.seek(entrada['o'])
+                return f.read(entrada['l'])
+        except FileNotFoundError:
+            return None  # segmento removido pela retenção
+
+    def listar(self, node_id=None, desde=None, ate=None, limite=50):
+        """Entradas do índice filtradas por nó e intervalo de tempo, mais recentes primeiro."""
+        with self._lock:
+            if node_id is not None:
+                entradas = list(self._por_no.get(node_id, []))
+            else:
+                entradas = sorted(self._por_alerta.values(), key=lambda e: e['t'])
+            atuais = dict(self._por_alerta)
+        resultado = []
+        for entrada in reversed(entradas):
+            if atuais.get(entrada['a']) is not entrada:
+                continue  # snapshot substituído por um de maior confiança
+            if ate is not None and entrada['t'] > ate:
+                continue
+            if desde is not None and entrada['t'] < desde:
+                break
+            resultado.append({
+                'alert_id': entrada['a'], 'node_id': entrada['n'],
+                'timestamp': entrada['t'], 'bytes': entrada['l']
+            })
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+    # =================== RETENÇÃO ===================
+
+    def aplicar_retencao(self, agora=None):
+        """Apaga segmentos inteiros mais velhos que `max_idade` ou além de `max_bytes`."""
+        agora = agora if agora is not None else time.time()
+        with self._lock:
+            removidos = []
+            total = sum(s['tamanho'] for s in self._segmentos.values())
+            for n in sorted(self._segmentos):
+                segmento = self._segmentos[n]
+                expirado = agora - segmento['fim'] > self.max_idade
+                if not expirado and total <= self.max_bytes:
+                    break
+                if n == self._ativo:
+                    self._fechar_segmento()
+                for extensao in ('bin', 'idx'):
+                    try:
+                        os.remove(self._caminho(n, extensao))
+                    except FileNotFoundError:
+                        pass
+                total -= segmento['tamanho']
+                del self._segmentos[n]
+                removidos.append(n)
+
+            if removidos:
+                apagados = set(removidos)
+                self._por_alerta = {a: e for a, e in self._por_alerta.items() if e['s'] not in apagados}
+                for node_id in list(self._por_no):
+                    restantes = [e for e in self._por_no[node_id] if e['s'] not in apagados]
+                    if restantes:
+                        self._por_no[node_id] = restantes
+                    else:
+                        del self._por_no[node_id]
+            return removidos
+
+    def resumo(self):
+        with self._lock:
+            return {
+                'segmentos': len(self._segmentos),
+                'bytes': sum(s['tamanho'] for s in self._segmentos.values()),
+                'snapshots': len(self._por_alerta)
+            }
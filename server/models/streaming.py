@@ -0,0 +1,164 @@
+# servidor-central/models/streaming.py
+"""
+Canal de reconhecimento em streaming, por sessão.
+
+O cliente abre uma sessão e envia quadros numerados; o servidor guarda
+apenas o quadro pendente mais recente de cada sessão (o anterior, se ainda
+não processado, é descartado) e um pool fixo de trabalhadores processa as
+sessões prontas, devolvendo os resultados de forma assíncrona. Assim a
+latência fica limitada a um quadro mesmo quando o cliente envia mais rápido
+do que o servidor processa.
+"""
+import queue
+import threading
+import time
+
+
+class CanalStreaming:
+
+    def __init__(self, processar, emitir, trabalhadores=2, suavizacao=0.2):
+        self._processar = processar   # quadro -> dict com o resultado
+        self._emitir = emitir         # (sid, evento, dados)
+        self._trabalhadores = trabalhadores
+        self._suavizacao = suavizacao
+        self._sessoes = {}
+        self._lock = threading.Lock()
+        self._prontas = queue.Queue()
+        self._iniciado = False
+
+    def iniciar(self):
+        if self._iniciado:
+            return
+        self._iniciado = True
+        for _ in range(self._trabalhadores):
+            threading.Thread(target=self._trabalhar, daemon=True).start()
+
+    # =================== SESSÕES ===================
+
+    def abrir(self, sid):
+        """Abre a sessão do sid; reabrir uma sessão já aberta não zera fila nem contadores."""
+        with self._lock:
+            if sid in self._sessoes:
+                return
+            self._sessoes[sid] = {
+                'aberta_em': time.time(),
+                'pendente': None,        # (seq, quadro, recebido_em) mais recente
+                'na_fila': False,
+                'processando': False,
+                'ultimo_seq_recebido': -1,
+                'ultimo_seq_processado': -1,
+                'recebidos': 0,
+                'processados': 0,
+                'descartados': 0,        # substituídos por um quadro mais novo antes de processar
+                'fora_de_ordem': 0,      # chegaram com seq menor que um já recebido
+                'erros': 0,
+                'lag_ms': 0.0            # média móvel de recebimento -> resultado
+            }
+
+    def fechar(self, sid):
+        """Encerra a sessão e retorna seus contadores finais (ou None se não existia)."""
+        with self._lock:
+            sessao = self._sessoes.pop(sid, None)
+        return self._contadores(sessao) if sessao else None
+
+    def aberta(self, sid):
+        return sid in self._sessoes
+
+    def receber(self, sid, seq, quadro):
+        """Guarda o quadro como pendente da sessão. Retorna False se foi ignorado."""
+        agora = time.time()
+        with self._lock:
+            sessao = self._sessoes.get(sid)
+            if sessao is None:
+                return False
+            if seq <= sessao['ultimo_seq_recebido']:
+                sessao['fora_de_ordem'] += 1
+                return False
+
+            sessao['ultimo_seq_recebido'] = seq
+            sessao['recebidos'] += 1
+            if sessao['pendente'] is not None:
+                sessao['descartados'] += 1
+            sessao['pendente'] = (seq, quadro, agora)
+
+            if not sessao['na_fila'] and not sessao['processando']:
+                sessao['na_fila'] = True
+                self._prontas.put(sid)
+        return True
+
+    # =================== PROCESSAMENTO ===================
+
+    def _trabalhar(self):
+        while True:
+            sid = self._prontas.get()
+            with self._lock:
+                sessao = self._sessoes.get(sid)
+                if sessao is None:
+                    continue
+                sessao['na_fila'] = False
+                if sessao['pendente'] is None:
+                    continue
+                seq, quadro, recebido_em = sessao['pendente']
+                sessao['pendente'] = None
+                sessao['processando'] = True
+
+            inicio = time.time()
+            try:
+                resultado = self._processar(quadro)
+                erro = False
+            except Exception as e:
+                resultado = {'erro': f'Erro no processamento: {str(e)}'}
+                erro = True
+            fim = time.time()
+
+            with self._lock:
+                sessao['processando'] = False
+                if erro:
+                    sessao['erros'] += 1
+                else:
+                    sessao['processados'] += 1
+                sessao['ultimo_seq_processado'] = seq
+                lag_ms = (fim - recebido_em) * 1000
+                if sessao['processados'] + sessao['erros'] == 1:
+                    sessao['lag_ms'] = lag_ms
+                else:
+                    sessao['lag_ms'] += self._suavizacao * (lag_ms - sessao['lag_ms'])
+                aberta = sid in self._sessoes
+                if aberta and sessao['pendente'] is not None:
+                    sessao['na_fila'] = True
+                    self._prontas.put(sid)
+                payload = {
+                    'seq': seq,
+                    **resultado,
+                    'lag': {
+                        'espera_ms': round((inicio - recebido_em) * 1000, 1),
+                        'processamento_ms': round((fim - inicio) * 1000, 1),
+                        'total_ms': round(lag_ms, 1),
+                        'quadros_atras': sessao['ultimo_seq_recebido'] - seq
+                    },
+                    'contadores': self._contadores(sessao)
+                }
+
+            if aberta:
+                try:
+                    self._emitir(sid, 'stream_resultado', payload)
+                except Exception as e:
+                    print(f"Erro ao emitir resultado do stream {sid}: {e}")
+
+    # =================== CONTADORES ===================
+
+    def _contadores(self, sessao):
+        return {
+            'recebidos': sessao['recebidos'],
+            'processados': sessao['processados'],
+            'descartados': sessao['descartados'],
+            'fora_de_ordem': sessao['fora_de_ordem'],
+            'erros': sessao['erros'],
+            'lag_medio_ms': round(sessao['lag_ms'], 1),
+            'ultimo_seq_recebido': sessao['ultimo_seq_recebido'],
+            'ultimo_seq_processado': sessao['ultimo_seq_processado']
+        }
+
+    def resumo(self):
+        with self._lock:
+            return {sid: self._contadores(sessao) for sid, sessao in self._sessoes.items()}
@@ -0,0 +1,54 @@
+# servidor-central/tests/test_alertas.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.alertas import AgrupadorAlertas, chave_deteccao
+
+
+class TestAgrupadorAlertas(unittest.TestCase):
+
+    def setUp(self):
+        self.agrupador = AgrupadorAlertas(janela=60)
+        self.chave = ('cam1', 'Ana')
+
+    def test_deteccoes_dentro_da_janela_sao_fundidas(self):
+        grupo, novo = self.agrupador.registrar(self.chave, {'confianca': 0.5}, agora=0)
+        self.assertTrue(novo)
+        mesmo, novo = self.agrupador.registrar(self.chave, {'confianca': 0.9}, agora=30)
+        self.assertFalse(novo)
+        self.assertIs(mesmo, grupo)
+        self.assertEqual(grupo['count'], 2)
+        self.assertEqual(grupo['best_confidence'], 0.9)
+
+    def test_grupo_substituido_antes_da_varredura_ainda_e_fechado(self):
+        antigo, _ = self.agrupador.registrar(self.chave, {}, agora=0)
+        novo_grupo, novo = self.agrupador.registrar(self.chave, {}, agora=62)
+        self.assertTrue(novo)
+        self.assertIsNot(novo_grupo, antigo)
+
+        fechados = self.agrupador.expirar(agora=63)
+        self.assertEqual(fechados, [antigo])
+        self.assertEqual(self.agrupador.abertos(), 1)
+        self.assertEqual(self.agrupador.expirar(agora=63), [])
+        self.assertEqual(self.agrupador.expirar(agora=123), [novo_grupo])
+
+    def test_grupo_despejado_por_limite_e_fechado(self):
+        agrupador = AgrupadorAlertas(janela=60, max_grupos=1)
+        primeiro, _ = agrupador.registrar(('cam1', 'Ana'), {}, agora=0)
+        segundo, _ = agrupador.registrar(('cam1', 'Bia'), {}, agora=1)
+        self.assertEqual(agrupador.expirar(agora=2), [primeiro])
+        self.assertEqual(agrupador.abertos(), 1)
+        self.assertEqual(agrupador.stats['grupos_fechados'], 1)
+
+    def test_desconhecidos_separados_por_track(self):
+        a = chave_deteccao('cam1', {'nome': 'Desconhecido', 'track_id': 1})
+        b = chave_deteccao('cam1', {'nome': 'Desconhecido', 'track_id': 2})
+        self.assertNotEqual(a, b)
+        self.assertEqual(chave_deteccao('cam1', {'nome': 'Ana', 'track_id': 1}), ('cam1', 'Ana'))
+
+
+if __name__ == '__main__':
+    unittest.main()
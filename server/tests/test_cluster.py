@@ -0,0 +1,110 @@
+# servidor-central/tests/test_cluster.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import EstadoMemoria
+
+try:
+    from models.cluster import AnelHash, Coordenador
+except ImportError:  # python-socketio ausente
+    AnelHash = Coordenador = None
+
+CHAVES = [f'cam{i}' for i in range(2000)]
+
+
+class TestEstadoMemoria(unittest.TestCase):
+
+    def test_hincr(self):
+        estado = EstadoMemoria()
+        self.assertEqual(estado.hincr('contadores', 'alert_id'), 1)
+        self.assertEqual(estado.hincr('contadores', 'alert_id', 5), 6)
+        self.assertEqual(estado.hget('contadores', 'alert_id'), 6)
+
+    def test_hsetnx(self):
+        estado = EstadoMemoria()
+        self.assertTrue(estado.hsetnx('galeria_log', '1', {'nome': 'Ana'}))
+        self.assertFalse(estado.hsetnx('galeria_log', '1', {'nome': 'Bia'}))
+        self.assertEqual(estado.hget('galeria_log', '1'), {'nome': 'Ana'})
+
+
+@unittest.skipIf(AnelHash is None, 'python-socketio não instalado')
+class TestAnelHash(unittest.TestCase):
+
+    def donos(self, membros):
+        anel = AnelHash(membros)
+        return {chave: anel.dono(chave) for chave in CHAVES}
+
+    def test_entrada_de_membro_move_so_para_o_novo(self):
+        antes = self.donos(['w1', 'w2', 'w3'])
+        depois = self.donos(['w1', 'w2', 'w3', 'w4'])
+        movidas = [chave for chave in CHAVES if antes[chave] != depois[chave]]
+
+        self.assertTrue(all(depois[chave] == 'w4' for chave in movidas))
+        self.assertLess(len(movidas), len(CHAVES) * 0.4)  # ~1/4 esperado
+
+    def test_saida_de_membro_move_so_as_dele(self):
+        antes = self.donos(['w1', 'w2', 'w3'])
+        depois = self.donos(['w1', 'w3'])
+        for chave in CHAVES:
+            if antes[chave] != 'w2':
+                self.assertEqual(depois[chave], antes[chave])
+            else:
+                self.assertIn(depois[chave], ('w1', 'w3'))
+
+    def test_anel_vazio(self):
+        self.assertIsNone(AnelHash([]).dono('cam1'))
+
+
+@unittest.skipIf(Coordenador is None, 'python-socketio não instalado')
+class TestCoordenador(unittest.TestCase):
+
+    def test_assume_nos_depois_do_ttl(self):
+        estado = EstadoMemoria()
+        w1 = Coordenador(estado, 'w1', 'http://w1', ttl=15)
+        w2 = Coordenador(estado, 'w2', 'http://w2', ttl=15)
+        nodes = CHAVES[:200]
+
+        w1.batimento(agora=100)
+        w2.batimento(agora=100)
+        self.assertTrue(w1.batimento(agora=101))  # passa a ver w2
+        assumidos_w1, _ = w1.rebalancear(nodes)
+        assumidos_w2, _ = w2.rebalancear(nodes)
+        self.assertEqual(assumidos_w1 | assumidos_w2, set(nodes))
+        self.assertFalse(assumidos_w1 & assumidos_w2)
+        self.assertEqual(w1.url_do_dono(next(iter(assumidos_w2))), 'http://w2')
+
+        # w2 para de bater; dentro do TTL nada muda
+        self.assertFalse(w1.batimento(agora=110))
+        self.assertEqual(w1.rebalancear(nodes), (set(), set()))
+
+        self.assertTrue(w1.batimento(agora=120))
+        assumidos, perdidos = w1.rebalancear(nodes)
+        self.assertEqual(assumidos, assumidos_w2)
+        self.assertEqual(perdidos, set())
+        self.assertNotIn('w2', estado.hgetall('workers'))
+        self.assertFalse(w1.distribuido)
+
+    def test_sair_libera_os_nos(self):
+        estado = EstadoMemoria()
+        w1 = Coordenador(estado, 'w1', 'http://w1')
+        w2 = Coordenador(estado, 'w2', 'http://w2')
+        w1.batimento(agora=100)
+        w2.batimento(agora=100)
+        w1.batimento(agora=100)
+        nodes = CHAVES[:50]
+        de_w1, _ = w1.rebalancear(nodes)
+        w2.rebalancear(nodes)
+
+        w1.sair()
+        w2.batimento(agora=101)  # sem esperar o TTL
+        assumidos, perdidos = w2.rebalancear(nodes)
+        self.assertEqual(assumidos, de_w1)
+        self.assertEqual(perdidos, set())
+        self.assertTrue(all(w2.eh_dono(node_id) for node_id in nodes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# servidor-central/tests/test_estatisticas.py
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import EstadoMemoria
+from models.estatisticas import EstatisticasDeteccoes, EstatisticasCompartilhadas
+
+
+class TestEstatisticasDeteccoes(unittest.TestCase):
+
+    def test_serie_e_persistencia(self):
+        arquivo = os.path.join(tempfile.mkdtemp(), 'stats.json')
+        estatisticas = EstatisticasDeteccoes(arquivo)
+        estatisticas.registrar('cam1', 'Ana', agora=120)
+        estatisticas.registrar('cam1', 'Ana', agora=130)
+        estatisticas.registrar('cam2', 'Bia', agora=185)
+        self.assertEqual(estatisticas.serie('minuto', 2, agora=185), [[120, 2], [180, 1]])
+        self.assertTrue(estatisticas.salvar())
+
+        recarregada = EstatisticasDeteccoes(arquivo)
+        recarregada.carregar()
+        self.assertEqual(recarregada.serie('minuto', 2, node_id='cam1', agora=185), [[120, 2], [180, 0]])
+        self.assertEqual(recarregada.totais_atuais()['identidades'], {'Ana': 2, 'Bia': 1})
+
+
+class TestEstatisticasCompartilhadas(unittest.TestCase):
+
+    def test_workers_somam_nas_mesmas_series(self):
+        estado = EstadoMemoria()
+        worker_a = EstatisticasCompartilhadas(estado)
+        worker_b = EstatisticasCompartilhadas(estado)
+        worker_a.registrar('cam1', 'Ana', agora=120)
+        worker_b.registrar('cam2', 'Ana', agora=125)
+        self.assertEqual(worker_b.total_geral(), 0)  # ainda não enviados
+
+        worker_a.salvar(agora=125)
+        worker_b.salvar(agora=125)
+        for worker in (worker_a, worker_b):
+            self.assertEqual(worker.serie('minuto', 1, agora=125), [[120, 2]])
+            self.assertEqual(worker.serie('minuto', 1, nome='Ana', agora=125), [[120, 2]])
+            self.assertEqual(worker.totais_atuais(), {
+                'geral': 2, 'nodes': {'cam1': 1, 'cam2': 1}, 'identidades': {'Ana': 2}
+            })
+
+    def test_intervalos_fora_da_janela_sao_removidos(self):
+        estado = EstadoMemoria()
+        estatisticas = EstatisticasCompartilhadas(estado)
+        estatisticas.registrar('cam1', 'Ana', agora=0)
+        estatisticas.salvar(agora=0)
+        um_dia = 24 * 60 * 60
+        estatisticas.registrar('cam1', 'Ana', agora=um_dia)
+        estatisticas.salvar(agora=um_dia)
+        self.assertEqual(list(estado.hgetall('serie:geral::minuto')), [str(um_dia // 60)])
+
+
+if __name__ == '__main__':
+    unittest.main()
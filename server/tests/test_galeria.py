@@ -0,0 +1,61 @@
+# servidor-central/tests/test_galeria.py
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.galeria import GaleriaVersionada
+
+ENCODING = [0.25] * 128
+
+
+class TestGaleriaVersionada(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.legado = os.path.join(self.diretorio, 'encodings.pickle')
+
+    def _galeria(self, **kwargs):
+        return GaleriaVersionada(os.path.join(self.diretorio, 'galeria.pickle'),
+                                 os.path.join(self.diretorio, 'galeria_log.pickle'),
+                                 arquivo_legado=self.legado, **kwargs)
+
+    def _ler_legado(self):
+        with open(self.legado, 'rb') as f:
+            return pickle.load(f)
+
+    def test_arquivo_legado_regravado_a_cada_mudanca(self):
+        galeria = self._galeria()
+        galeria.adicionar('Ana', ENCODING)
+        self.assertEqual(self._ler_legado()['nomes'], ['Ana'])
+        galeria.remover('ana')
+        self.assertEqual(self._ler_legado(), {'nomes': [], 'encodings': []})
+
+    def test_primeira_carga_parte_do_arquivo_legado(self):
+        with open(self.legado, 'wb') as f:
+            pickle.dump({'nomes': ['Ana', 'Bia'], 'encodings': [ENCODING, ENCODING]}, f)
+        galeria = self._galeria()
+        self.assertEqual(galeria.versao, 2)
+        galeria.adicionar('Caio', ENCODING)
+
+        recarregada = self._galeria()
+        self.assertEqual(recarregada.versao, 3)
+        self.assertEqual(sorted(recarregada.como_dicionario()['nomes']), ['Ana', 'Bia', 'Caio'])
+
+    def test_mudancas_desde_versao(self):
+        galeria = self._galeria()
+        galeria.adicionar('Ana', ENCODING)
+        galeria.adicionar('Bia', ENCODING)
+        galeria.remover('Ana')
+        mudancas = galeria.mudancas_desde(1)
+        self.assertEqual([item['nome'] for item in mudancas['adicionados']], ['Bia'])
+        self.assertEqual(mudancas['removidos'], [{'nome': 'Ana'}])
+        self.assertTrue(galeria.mudancas_desde(99)['completo'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# servidor-central/tests/test_protocols.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from shared import protocols
+from shared.utils import ErroProtocolo
+
+ENCODING = [0.5, -0.25] * 64
+
+
+class TestProtocolo(unittest.TestCase):
+
+    def ida_e_volta(self, mensagem, **kwargs):
+        return protocols.decodificar(protocols.codificar(mensagem, **kwargs))
+
+    def test_registro(self):
+        mensagem = {'tipo': 'registro', 'node_id': 'cam1', 'location': 'Portaria', 'type': 'camera', 'url': None}
+        self.assertEqual(self.ida_e_volta(mensagem), mensagem)
+
+    def test_heartbeat(self):
+        recebida = self.ida_e_volta({'tipo': 'heartbeat', 'node_id': 'cam1', 'timestamp': 123.5,
+                                     'fps': 15.0, 'frames': 900})
+        self.assertEqual(recebida, {'tipo': 'heartbeat', 'node_id': 'cam1', 'timestamp': 123.5,
+                                    'fps': 15.0, 'frames': 900})
+
+    def test_deteccao(self):
+        recebida = self.ida_e_volta({
+            'tipo': 'deteccao', 'node_id': 'cam1', 'timestamp': 10.0, 'jpeg': b'\xff\xd8jpeg',
+            'rostos': [
+                {'nome': 'Ana', 'confianca': 0.5, 'localizacao': {'top': 1, 'right': 2, 'bottom': 3, 'left': 4},
+                 'encoding': ENCODING},
+                {'nome': 'Desconhecido', 'confianca': 0.25, 'track_id': 7},
+            ]
+        })
+        ana, desconhecido = recebida['rostos']
+        self.assertEqual(recebida['jpeg'], b'\xff\xd8jpeg')
+        self.assertEqual(ana['localizacao'], {'top': 1, 'right': 2, 'bottom': 3, 'left': 4})
+        self.assertEqual(list(ana['encoding']), ENCODING)  # valores exatos em float16
+        self.assertNotIn('track_id', ana)
+        self.assertEqual(desconhecido['track_id'], 7)
+        self.assertNotIn('encoding', desconhecido)
+
+    def test_galeria_float32(self):
+        recebida = self.ida_e_volta({'tipo': 'galeria', 'versao': 3, 'acao': 'updated', 'nome': 'Ana',
+                                     'encoding': ENCODING}, float16=False)
+        self.assertEqual((recebida['versao'], recebida['acao'], recebida['nome']), (3, 'updated', 'Ana'))
+        self.assertEqual(list(recebida['encoding']), ENCODING)
+        removida = self.ida_e_volta({'tipo': 'galeria', 'versao': 4, 'acao': 'removed', 'nome': 'Ana'})
+        self.assertNotIn('encoding', removida)
+
+    def test_quadro_v1_continua_legivel(self):
+        quadro = bytearray(protocols.codificar({
+            'tipo': 'deteccao', 'node_id': 'cam1', 'rostos': [{'nome': 'Ana', 'encoding': ENCODING}]
+        }))
+        quadro[2] = 1  # versão no cabeçalho; v1 só usava o bit de encoding nos rostos
+        rosto = protocols.decodificar(bytes(quadro))['rostos'][0]
+        self.assertEqual(list(rosto['encoding']), ENCODING)
+        self.assertNotIn('track_id', rosto)
+
+    def test_versao_futura_rejeitada(self):
+        quadro = bytearray(protocols.codificar({'tipo': 'heartbeat', 'node_id': 'cam1'}))
+        quadro[2] = protocols.VERSAO_PROTOCOLO + 1
+        with self.assertRaises(ErroProtocolo):
+            protocols.decodificar(bytes(quadro))
+
+    def test_ler_quadros_com_buffer_parcial(self):
+        quadros = [protocols.codificar({'tipo': 'heartbeat', 'node_id': f'cam{i}'}) for i in range(3)]
+        fluxo = b''.join(quadros)
+        corte = len(quadros[0]) + 5
+
+        mensagens, resto = protocols.ler_quadros(fluxo[:corte])
+        self.assertEqual([m['node_id'] for m in mensagens], ['cam0'])
+        self.assertEqual(resto, fluxo[len(quadros[0]):corte])
+
+        mensagens, resto = protocols.ler_quadros(resto + fluxo[corte:])
+        self.assertEqual([m['node_id'] for m in mensagens], ['cam1', 'cam2'])
+        self.assertEqual(resto, b'')
+
+        self.assertEqual(protocols.ler_quadros(fluxo[:4]), ([], fluxo[:4]))
+
+    def test_caixas_fora_do_quadro_sao_limitadas(self):
+        rosto = self.ida_e_volta({'tipo': 'deteccao', 'node_id': 'cam1', 'rostos': [
+            {'localizacao': {'top': -1, 'right': 70000, 'bottom': 10, 'left': 0}}
+        ]})['rostos'][0]
+        self.assertEqual(rosto['localizacao'], {'top': 0, 'right': 65535, 'bottom': 10, 'left': 0})
+
+    def test_erros_de_codificacao_viram_erro_de_protocolo(self):
+        invalidas = [
+            {'tipo': 'deteccao', 'rostos': []},                                  # sem node_id
+            {'tipo': 'heartbeat', 'node_id': 'cam1', 'frames': -1},              # fora do u32
+            {'tipo': 'galeria', 'versao': 1, 'acao': 'renamed', 'nome': 'Ana'},  # ação desconhecida
+            {'tipo': 'deteccao', 'node_id': 'cam1', 'rostos': [{'encoding': [0.0] * 3}]},
+            {'tipo': 'desconhecido'},
+        ]
+        for mensagem in invalidas:
+            with self.subTest(mensagem=mensagem), self.assertRaises(ErroProtocolo):
+                protocols.codificar(mensagem)
+
+    def test_quadros_malformados(self):
+        quadro = protocols.codificar({'tipo': 'heartbeat', 'node_id': 'cam1'})
+        for dados in (b'XX' + quadro[2:], quadro[:-1], quadro[:5]):
+            with self.subTest(dados=dados), self.assertRaises(ErroProtocolo):
+                protocols.decodificar(dados)
+        self.assertTrue(protocols.eh_binario(quadro))
+        self.assertFalse(protocols.eh_binario(b'{"tipo": "heartbeat"}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
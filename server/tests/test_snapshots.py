@@ -0,0 +1,51 @@
+# servidor-central/tests/test_snapshots.py
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.snapshots import ArmazemSnapshots
+
+
+class TestArmazemSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.armazem = ArmazemSnapshots(self.diretorio)
+
+    def test_leitura_devolve_os_bytes_gravados(self):
+        self.armazem.guardar(1, 'n', b'jpeg-1', timestamp=100)
+        self.assertEqual(self.armazem.ler(1), b'jpeg-1')
+        self.assertIsNone(self.armazem.ler(2))
+
+    def test_listar_por_no_com_captura_antiga_gravada_depois(self):
+        self.armazem.guardar(3, 'n', b'c', timestamp=100)
+        self.armazem.guardar(2, 'n', b'b', timestamp=120)
+        self.armazem.guardar(1, 'n', b'a', timestamp=90)  # melhor captura do alerta 1, gravada no fechamento
+
+        ids = [s['alert_id'] for s in self.armazem.listar(node_id='n', desde=95)]
+        self.assertEqual(ids, [2, 3])
+        ids = [s['alert_id'] for s in self.armazem.listar(node_id='n')]
+        self.assertEqual(ids, [2, 3, 1])
+
+    def test_indices_recarregados_mantem_ordem(self):
+        self.armazem.guardar(3, 'n', b'c', timestamp=100)
+        self.armazem.guardar(1, 'n', b'a', timestamp=90)
+        recarregado = ArmazemSnapshots(self.diretorio)
+        ids = [s['alert_id'] for s in recarregado.listar(node_id='n', desde=95)]
+        self.assertEqual(ids, [3])
+        self.assertEqual(recarregado.ler(1), b'a')
+
+    def test_mesmo_quadro_em_varios_alertas_e_gravado_uma_vez(self):
+        quadro = b'quadro-com-dois-rostos'
+        self.armazem.guardar(1, 'n', quadro, timestamp=100)
+        self.armazem.guardar(2, 'n', quadro, timestamp=100)
+        self.assertEqual(self.armazem.resumo()['bytes'], len(quadro))
+        self.assertEqual(self.armazem.ler(2), quadro)
+        self.assertEqual(ArmazemSnapshots(self.diretorio).ler(2), quadro)
+
+
+if __name__ == '__main__':
+    unittest.main()
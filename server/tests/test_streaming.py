@@ -0,0 +1,34 @@
+# servidor-central/tests/test_streaming.py
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.streaming import CanalStreaming
+
+
+class TestCanalStreaming(unittest.TestCase):
+
+    def test_reabrir_sessao_aberta_preserva_estado(self):
+        canal = CanalStreaming(processar=lambda quadro: {}, emitir=lambda *args: None)
+        canal.abrir('sid1')
+        self.assertTrue(canal.receber('sid1', 1, 'q1'))
+        self.assertTrue(canal.receber('sid1', 2, 'q2'))
+
+        canal.abrir('sid1')
+
+        self.assertEqual(canal.resumo()['sid1']['recebidos'], 2)
+        self.assertFalse(canal.receber('sid1', 1, 'antigo'))  # seq já superado continua fora de ordem
+
+    def test_abrir_depois_de_fechar_recomeca(self):
+        canal = CanalStreaming(processar=lambda quadro: {}, emitir=lambda *args: None)
+        canal.abrir('sid1')
+        canal.receber('sid1', 1, 'q1')
+        canal.fechar('sid1')
+        canal.abrir('sid1')
+        self.assertEqual(canal.resumo()['sid1']['recebidos'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+# shared/protocols.py
+"""
+Protocolo binário versionado entre nós de câmera e servidor central.
+
+Cada quadro tem um cabeçalho fixo de 10 bytes seguido do corpo:
+
+    magic 'MK' (2) | versão (1) | tipo (1) | flags (1) | reservado (1) | tamanho do corpo (4)
+
+Os corpos usam campos little-endian de tamanho fixo, textos com prefixo u16
+e blobs com prefixo u32. Encodings de 128 dimensões vão em float16 por padrão
+(256 bytes contra ~2.7 KB em JSON) e imagens viajam como bytes JPEG crus, sem
+base64. As mensagens são dicionários com a chave 'tipo', no mesmo formato que
+o servidor já usa nos payloads JSON.
+"""
+import json
+import struct
+import time
+
+from shared.utils import Escritor, Leitor, ErroProtocolo, jpeg_para_base64
+
+VERSAO_PROTOCOLO = 2  # v2: track_id opcional nos rostos de 'deteccao'
+MAGIC = b'MK'
+
+_CABECALHO = struct.Struct('<2sBBBBI')
+TAMANHO_CABECALHO = _CABECALHO.size
+
+FLAG_FLOAT16 = 0x01
+
+# Campos opcionais de cada rosto em 'deteccao' (byte de presença; v1 só usava ROSTO_ENCODING)
+ROSTO_ENCODING = 0x01
+ROSTO_TRACK_ID = 0x02
+
+TIPOS = {
+    'registro': 1,
+    'heartbeat': 2,
+    'deteccao': 3,
+    'galeria': 4,
+}
+_NOMES_TIPOS = {codigo: nome for nome, codigo in TIPOS.items()}
+
+ACOES_GALERIA = {'added': 1, 'updated': 2, 'removed': 3}
+_NOMES_ACOES = {codigo: nome for nome, codigo in ACOES_GALERIA.items()}
+
+# =================== CORPOS POR TIPO ===================
+
+def _escrever_registro(e, msg, float16):
+    e.texto(msg['node_id'])
+    e.texto(msg.get('location', ''))
+    e.texto(msg.get('type', 'camera'))
+    e.texto(msg.get('url') or '')
+
+def _ler_registro(l, float16):
+    return {
+        'node_id': l.texto(),
+        'location': l.texto(),
+        'type': l.texto(),
+        'url': l.texto() or None
+    }
+
+def _escrever_heartbeat(e, msg, float16):
+    e.texto(msg['node_id'])
+    e.f64(msg.get('timestamp') or time.time())
+    e.f32(msg.get('fps', 0.0))
+    e.u32(msg.get('frames', 0))
+
+def _ler_heartbeat(l, float16):
+    return {
+        'node_id': l.texto(),
+        'timestamp': l.f64(),
+        'fps': l.f32(),
+        'frames': l.u32()
+    }
+
+def _escrever_deteccao(e, msg, float16):
+    rostos = msg.get('rostos', [])
+    e.texto(msg['node_id'])
+    e.f64(msg.get('timestamp') or time.time())
+    e.u16(len(rostos))
+    for rosto in rostos:
+        loc = rosto.get('localizacao', {})
+        e.texto(rosto.get('nome', 'Desconhecido'))
+        e.f32(rosto.get('confianca', 0.0))
+        for campo in ('top', 'right', 'bottom', 'left'):
+            e.u16(min(max(int(loc.get(campo, 0)), 0), 0xFFFF))  # caixas podem sair do quadro
+        encoding = rosto.get('encoding')
+        track_id = rosto.get('track_id')
+        e.u8((ROSTO_ENCODING if encoding is not None else 0)
+             | (ROSTO_TRACK_ID if track_id is not None else 0))
+        if encoding is not None:
+            e.encoding(encoding, float16)
+        if track_id is not None:
+            e.u32(int(track_id))
+    e.blob(msg.get('jpeg'))
+
+def _ler_deteccao(l, float16):
+    node_id = l.texto()
+    timestamp = l.f64()
+    rostos = []
+    for _ in range(l.u16()):
+        rosto = {'nome': l.texto(), 'confianca': l.f32()}
+        rosto['localizacao'] = {campo: l.u16() for campo in ('top', 'right', 'bottom', 'left')}
+        campos = l.u8()
+        if campos & ROSTO_ENCODING:
+            rosto['encoding'] = l.encoding(float16)
+        if campos & ROSTO_TRACK_ID:
+            rosto['track_id'] = l.u32()
+        rostos.append(rosto)
+    jpeg = l.blob()
+    return {'node_id': node_id, 'timestamp': timestamp, 'rostos': rostos, 'jpeg': jpeg or None}
+
+def _escrever_galeria(e, msg, float16):
+    e.u32(msg['versao'])
+    e.u8(ACOES_GALERIA[msg['acao']])
+    e.texto(msg['nome'])
+    encoding = msg.get('encoding')
+    e.u8(0 if encoding is None else 1)
+    if encoding is not None:
+        e.encoding(encoding, float16)
+
+def _ler_galeria(l, float16):
+    msg = {'versao': l.u32()}
+    codigo = l.u8()
+    if codigo not in _NOMES_ACOES:
+        raise ErroProtocolo(f'Ação de galeria desconhecida: {codigo}')
+    msg['acao'] = _NOMES_ACOES[codigo]
+    msg['nome'] = l.texto()
+    if l.u8():
+        msg['encoding'] = l.encoding(float16)
+    return msg
+
+_ESCRITORES = {
+    'registro': _escrever_registro,
+    'heartbeat': _escrever_heartbeat,
+    'deteccao': _escrever_deteccao,
+    'galeria': _escrever_galeria,
+}
+_LEITORES = {
+    'registro': _ler_registro,
+    'heartbeat': _ler_heartbeat,
+    'deteccao': _ler_deteccao,
+    'galeria': _ler_galeria,
+}
+
+# =================== API PÚBLICA ===================
+
+def codificar(mensagem, float16=True):
+    """Serializa uma mensagem (dict com 'tipo') em um quadro binário."""
+    tipo = mensagem.get('tipo')
+    if tipo not in TIPOS:
+        raise ErroProtocolo(f'Tipo de mensagem desconhecido: {tipo}')
+    e = Escritor()
+    try:
+        _ESCRITORES[tipo](e, mensagem, float16)
+    except ErroProtocolo:
+        raise
+    except KeyError as erro:
+        raise ErroProtocolo(f'Campo obrigatório ausente em {tipo}: {erro}')
+    except (struct.error, TypeError, ValueError) as erro:
+        raise ErroProtocolo(f'Campo inválido em {tipo}: {erro}')
+    corpo = e.bytes()
+    flags = FLAG_FLOAT16 if float16 else 0
+    return _CABECALHO.pack(MAGIC, VERSAO_PROTOCOLO, TIPOS[tipo], flags, 0, len(corpo)) + corpo
+
+def _ler_cabecalho(dados, inicio=0):
+    if len(dados) - inicio < TAMANHO_CABECALHO:
+        raise ErroProtocolo('Cabeçalho incompleto')
+    magic, versao, codigo, flags, _, tamanho = _CABECALHO.unpack_from(dados, inicio)
+    if magic != MAGIC:
+        raise ErroProtocolo('Assinatura inválida')
+    if versao > VERSAO_PROTOCOLO:
+        raise ErroProtocolo(f'Versão {versao} não suportada (máx. {VERSAO_PROTOCOLO})')
+    if codigo not in _NOMES_TIPOS:
+        raise ErroProtocolo(f'Tipo de mensagem desconhecido: {codigo}')
+    return _NOMES_TIPOS[codigo], flags, tamanho
+
+def decodificar(dados):
+    """Desserializa um quadro completo produzido por `codificar`."""
+    tipo, flags, tamanho = _ler_cabecalho(dados)
+    if len(dados) != TAMANHO_CABECALHO + tamanho:
+        raise ErroProtocolo('Tamanho do quadro não confere com o cabeçalho')
+    try:
+        mensagem = _LEITORES[tipo](Leitor(dados, TAMANHO_CABECALHO), bool(flags & FLAG_FLOAT16))
+    except UnicodeDecodeError as erro:
+        raise ErroProtocolo(f'Texto inválido: {erro}')
+    mensagem['tipo'] = tipo
+    return mensagem
+
+def ler_quadros(buffer):
+    """
+    Extrai quadros completos de um buffer de stream (ex.: socket TCP).
+
+    Retorna (mensagens, resto), onde `resto` são os bytes de um quadro ainda
+    incompleto que devem ser prefixados à próxima leitura.
+    """
+    mensagens = []
+    pos = 0
+    while len(buffer) - pos >= TAMANHO_CABECALHO:
+        _, _, tamanho = _ler_cabecalho(buffer, pos)
+        fim = pos + TAMANHO_CABECALHO + tamanho
+        if fim > len(buffer):
+            break
+        mensagens.append(decodificar(bytes(buffer[pos:fim])))
+        pos = fim
+    return mensagens, bytes(buffer[pos:])
+
+def eh_binario(dados):
+    """Indica se um payload recebido é um quadro deste protocolo (e não JSON)."""
+    return isinstance(dados, (bytes, bytearray)) and dados[:2] == MAGIC
+
+# =================== COMPARAÇÃO COM JSON ===================
+
+def _deteccao_exemplo(num_rostos=2, tamanho_jpeg=30000):
+    import random
+    rng = random.Random(42)
+    return {
+        'tipo': 'deteccao',
+        'node_id': 'camera_entrada_01',
+        'timestamp': time.time(),
+        'rostos': [{
+            'nome': 'Desconhecido' if i else 'Maria Silva',
+            'confianca': 0.87,
+            'localizacao': {'top': 120, 'right': 340, 'bottom': 260, 'left': 200},
+            'encoding': [rng.uniform(-0.3, 0.3) for _ in range(128)]
+        } for i in range(num_rostos)],
+        'jpeg': bytes(rng.getrandbits(8) for _ in range(tamanho_jpeg))
+    }
+
+def _como_json(mensagem):
+    """Payload equivalente no formato atual: JSON com encodings em lista e imagem em base64."""
+    payload = {k: v for k, v in mensagem.items() if k != 'jpeg'}
+    payload['imagem'] = jpeg_para_base64(mensagem['jpeg'])
+    return json.dumps(payload).encode('utf-8')
+
+def comparar_com_json(repeticoes=500, num_rostos=2, tamanho_jpeg=30000):
+    """Mede tamanho e vazão de codificação/decodificação do protocolo binário contra JSON."""
+    from shared.utils import jpeg_de_base64
+
+    mensagem = _deteccao_exemplo(num_rostos, tamanho_jpeg)
+
+    def medir(funcao):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        return repeticoes / (time.perf_counter() - inicio)
+
+    def decodificar_json(dados):
+        payload = json.loads(dados)
+        jpeg_de_base64(payload['imagem'])
+        return payload
+
+    dados_json = _como_json(mensagem)
+    resultados = {'json': {
+        'bytes': len(dados_json),
+        'codificar_por_s': medir(lambda: _como_json(mensagem)),
+        'decodificar_por_s': medir(lambda: decodificar_json(dados_json))
+    }}
+    for nome, float16 in (('binario_f32', False), ('binario_f16', True)):
+        dados = codificar(mensagem, float16)
+        resultados[nome] = {
+            'bytes': len(dados),
+            'codificar_por_s': medir(lambda: codificar(mensagem, float16)),
+            'decodificar_por_s': medir(lambda: decodificar(dados))
+        }
+
+    # Sem imagem: o caso típico de detecções que só carregam metadados
+    sem_imagem = dict(mensagem, jpeg=b'')
+    resultados['json_sem_imagem'] = {'bytes': len(json.dumps({k: v for k, v in sem_imagem.items() if k != 'jpeg'}))}
+    resultados['binario_f16_sem_imagem'] = {'bytes': len(codificar(sem_imagem))}
+    return resultados
+
+if __name__ == '__main__':
+    print(f"{'formato':<24}{'bytes':>10}{'cod/s':>12}{'dec/s':>12}")
+    for nome, r in comparar_com_json().items():
+        print(f"{nome:<24}{r['bytes']:>10}"
+              f"{r.get('codificar_por_s', 0):>12.0f}{r.get('decodificar_por_s', 0):>12.0f}")
@@ -0,0 +1,149 @@
+# shared/utils.py
+"""Utilitários binários compartilhados entre servidor e nós de câmera."""
+import base64
+import struct
+
+DIMENSAO_ENCODING = 128
+
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_F32 = struct.Struct('<f')
+_F64 = struct.Struct('<d')
+_ENC_F16 = struct.Struct(f'<{DIMENSAO_ENCODING}e')
+_ENC_F32 = struct.Struct(f'<{DIMENSAO_ENCODING}f')
+
+
+class ErroProtocolo(ValueError):
+    """Mensagem binária malformada ou incompatível."""
+
+
+class Escritor:
+    """Acumula campos binários little-endian em um único buffer."""
+
+    def __init__(self):
+        self._partes = []
+
+    def u8(self, valor):
+        self._partes.append(_U8.pack(valor))
+
+    def u16(self, valor):
+        self._partes.append(_U16.pack(valor))
+
+    def u32(self, valor):
+        self._partes.append(_U32.pack(valor))
+
+    def f32(self, valor):
+        self._partes.append(_F32.pack(valor))
+
+    def f64(self, valor):
+        self._partes.append(_F64.pack(valor))
+
+    def texto(self, valor):
+        dados = (valor or '').encode('utf-8')
+        if len(dados) > 0xFFFF:
+            raise ErroProtocolo('Texto excede 65535 bytes')
+        self._partes.append(_U16.pack(len(dados)))
+        self._partes.append(dados)
+
+    def blob(self, dados):
+        dados = dados or b''
+        self._partes.append(_U32.pack(len(dados)))
+        self._partes.append(bytes(dados))
+
+    def encoding(self, encoding, float16=True):
+        self._partes.append(empacotar_encoding(encoding, float16))
+
+    def bytes(self):
+        return b''.join(self._partes)
+
+
+class Leitor:
+    """Lê campos de um buffer produzido por `Escritor`, sem cópias extras."""
+
+    def __init__(self, dados, inicio=0):
+        self._dados = memoryview(dados)
+        self._pos = inicio
+
+    def _ler(self, estrutura):
+        try:
+            valor = estrutura.unpack_from(self._dados, self._pos)[0]
+        except struct.error as e:
+            raise ErroProtocolo(f'Mensagem truncada: {e}')
+        self._pos += estrutura.size
+        return valor
+
+    def u8(self):
+        return self._ler(_U8)
+
+    def u16(self):
+        return self._ler(_U16)
+
+    def u32(self):
+        return self._ler(_U32)
+
+    def f32(self):
+        return self._ler(_F32)
+
+    def f64(self):
+        return self._ler(_F64)
+
+    def _fatia(self, tamanho):
+        fim = self._pos + tamanho
+        if fim > len(self._dados):
+            raise ErroProtocolo('Mensagem truncada')
+        fatia = self._dados[self._pos:fim]
+        self._pos = fim
+        return fatia
+
+    def texto(self):
+        return bytes(self._fatia(self.u16())).decode('utf-8')
+
+    def blob(self):
+        return bytes(self._fatia(self.u32()))
+
+    def encoding(self, float16=True):
+        estrutura = _ENC_F16 if float16 else _ENC_F32
+        return desempacotar_encoding(self._fatia(estrutura.size), float16)
+
+
+def _numpy():
+    """numpy importado só quando um encoding é (des)serializado; nós leves podem rodar sem ele."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def empacotar_encoding(encoding, float16=True):
+    """Serializa um encoding 128-d em float16 (256 bytes) ou float32 (512 bytes)."""
+    np = _numpy()
+    if np is not None and isinstance(encoding, np.ndarray):
+        if encoding.size != DIMENSAO_ENCODING:
+            raise ErroProtocolo(f'Encoding deve ter {DIMENSAO_ENCODING} dimensões')
+        return encoding.astype('<f2' if float16 else '<f4', copy=False).tobytes()
+    valores = list(encoding)
+    if len(valores) != DIMENSAO_ENCODING:
+        raise ErroProtocolo(f'Encoding deve ter {DIMENSAO_ENCODING} dimensões')
+    return (_ENC_F16 if float16 else _ENC_F32).pack(*valores)
+
+
+def desempacotar_encoding(dados, float16=True):
+    """Inverso de `empacotar_encoding`; devolve ndarray float64 quando numpy existe."""
+    np = _numpy()
+    if np is not None:
+        return np.frombuffer(dados, dtype='<f2' if float16 else '<f4').astype(np.float64)
+    return list((_ENC_F16 if float16 else _ENC_F32).unpack(dados))
+
+
+def jpeg_de_base64(imagem_base64):
+    """Extrai os bytes JPEG de uma string base64 (com ou sem prefixo data URL)."""
+    if ',' in imagem_base64:
+        imagem_base64 = imagem_base64.split(',', 1)[1]
+    return base64.b64decode(imagem_base64)
+
+
+def jpeg_para_base64(dados_jpeg):
+    """Converte bytes JPEG em data URL, formato usado hoje pelos clientes web."""
+    return 'data:image/jpeg;base64,' + base64.b64encode(dados_jpeg).decode('ascii')